@@ -32,8 +32,13 @@ setup(name='validatish',
       install_requires=[
           # -*- Extra requirements: -*-
       ],
+      extras_require={
+          'numpy': ['numpy'],
+      },
       entry_points="""
       # -*- Entry points: -*-
+      [console_scripts]
+      validatish = validatish.cli:main
       """,
       test_suite='validatish.tests',
       )
@@ -1,10 +1,16 @@
 # Expose "public" API at package scope.
+from validatish.compiler import compile
+from validatish.concurrency import AsyncValidator, ConcurrentAll, ConcurrentAny
 from validatish.error import Invalid
+from validatish.instrumentation import instrument
+from validatish.optimiser import optimise
+from validatish.parallel import validate_parallel
+from validatish.spec import from_spec, load_spec, to_spec
 from validatish.util import validation_includes
 from validatish.validate import has_length, is_email, is_equal, is_in_range, \
         is_integer, is_number, is_one_of, is_plaintext, is_required, \
         is_string, is_url, is_domain_name
-from validatish.validator import All, Always, Any, CompoundValidator, Email, \
-        Equal, Integer, Length, Number, OneOf, PlainText, Range, Required, \
-        String, URL, Validator, DomainName
+from validatish.validator import Adaptive, All, Always, Any, Cached, \
+        CompoundValidator, Email, Equal, Integer, Length, Mapping, Number, \
+        OneOf, PlainText, Range, Required, String, URL, Validator, DomainName
 
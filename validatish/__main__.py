@@ -0,0 +1,11 @@
+"""
+Validate a CSV or JSON lines file, see validatish.cli.
+"""
+
+import sys
+
+from validatish.cli import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
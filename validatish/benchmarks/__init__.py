@@ -0,0 +1,57 @@
+"""
+Benchmarks for validatish.
+
+The suite times every functional validator and validator class on passing,
+failing and adversarial values, plus some composed trees, and can compare the
+results with a stored baseline::
+
+    python -m validatish.benchmarks --output results.json
+    python -m validatish.benchmarks --baseline results.json
+
+The other modules are focused micro-benchmarks which can be run on their own,
+e.g.::
+
+    python -m validatish.benchmarks.plaintext
+"""
+
+import gc
+import sys
+import timeit
+
+
+def per_call(fn, number=100000, repeat=5):
+    """
+    Return the best per-call time of fn, in microseconds.
+    """
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def calibrated(fn, duration=0.05, repeat=5):
+    """
+    Return the best per-call time of fn, in microseconds, choosing the number
+    of calls so that each repeat takes roughly duration seconds.
+    """
+    once = timeit.timeit(fn, number=1)
+    number = max(1, int(duration / max(once, 1e-7)))
+    return per_call(fn, number=number, repeat=repeat)
+
+
+def report(name, usec):
+    print('%-60s %10.3f usec' % (name, usec))
+
+
+def sizeof(obj, seen):
+    """
+    Return the bytes used by obj and everything it refers to, except classes
+    and the objects whose ids are in seen, which is updated.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
@@ -0,0 +1,54 @@
+"""
+Run the benchmark suite, e.g.::
+
+    python -m validatish.benchmarks --output results.json
+    python -m validatish.benchmarks --baseline results.json --threshold 0.1
+"""
+
+import json
+import optparse
+import sys
+
+from validatish.benchmarks import report, suite
+
+
+def main(args=None):
+    parser = optparse.OptionParser(usage='python -m validatish.benchmarks [options]')
+    parser.add_option('-o', '--output', help='write the results as JSON to this file')
+    parser.add_option('-b', '--baseline', help='compare the results with this JSON file')
+    parser.add_option('-t', '--threshold', type='float', default=0.2,
+                      help='fraction slower than the baseline counted as a regression [%default]')
+    parser.add_option('-m', '--match', help='only run benchmarks whose name contains this')
+    parser.add_option('-d', '--duration', type='float', default=0.05,
+                      help='approximate seconds per timing run [%default]')
+    parser.add_option('-q', '--quiet', action='store_true', help='do not print each result')
+    options, args = parser.parse_args(args)
+
+    progress = None
+    if not options.quiet:
+        progress = report
+    results = suite.run(match=options.match, duration=options.duration, progress=progress)
+
+    if options.output:
+        f = open(options.output, 'w')
+        try:
+            json.dump(results, f, indent=2, sort_keys=True)
+        finally:
+            f.close()
+
+    if options.baseline:
+        f = open(options.baseline)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        regressions = suite.compare(baseline, results, options.threshold)
+        for name, base, usec, ratio in regressions:
+            print('REGRESSION %-49s %10.3f -> %10.3f usec (x%.2f)' % (name, base, usec, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Adaptive ordering: an Any whose last alternative passes 95% of the time and
+the is_valid of an All whose last, cheap, validator rejects most values,
+with and without Adaptive.
+"""
+
+import timeit
+
+from validatish import validator
+from validatish.benchmarks import report
+
+
+COUNT = 20000
+
+
+def any_case():
+    fn = validator.Any(validator.Email(), validator.DomainName(),
+                       validator.OneOf(['GB', 'FR', 'DE']), validator.Length(max=8))
+    values = [i % 20 and 'user%d' % (i % 1000) or 'x' * 10 for i in xrange(COUNT)]
+    return fn, values, '_validate'
+
+
+def all_case():
+    fn = validator.All(validator.Required(), validator.Email(), validator.Length(max=20))
+    values = [i % 20 and 'someone-%d@example.com' % i or 'a@example.com'
+              for i in xrange(COUNT)]
+    return fn, values, 'is_valid'
+
+
+def run(fn, values, method):
+    call = getattr(fn, method)
+    for value in values:
+        call(value)
+
+
+def main():
+    for label, case in [('Any, last passes 95%', any_case),
+                        ('All.is_valid, last fails 95%', all_case)]:
+        fn, values, method = case()
+        adaptive = validator.Adaptive(fn)
+        for name, v in [('fixed', fn), ('Adaptive', adaptive)]:
+            seconds = min(timeit.repeat(lambda: run(v, values, method), number=1, repeat=3))
+            report('%s: %s' % (label, name), seconds / len(values) * 1e6)
+        for info in adaptive.child_info():
+            print('    %-56s %3d%% passed, position %d' % (
+                info.validator, 100 * info.passed / max(info.calls, 1), info.position))
+
+
+if __name__ == '__main__':
+    main()
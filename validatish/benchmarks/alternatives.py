@@ -0,0 +1,49 @@
+"""
+Per-call cost of Any with 2, 5 and 20 alternatives where only the last one
+passes, compared with the 0.6.3 approach of building an Invalid for each
+alternative that fails along the way. The case where every alternative
+fails is also timed, where the exceptions are built after checking them all.
+"""
+
+from validatish import compile, validator
+from validatish.validator import _validate
+from validatish.benchmarks import per_call, report
+
+
+def legacy_validate(any_validator, v):
+    """ The 0.6.3 Any, building an Invalid for every failing alternative """
+    exceptions = []
+    for child in any_validator.validators:
+        e = _validate(child, v)
+        if e is None:
+            return
+        exceptions.append(e)
+    return any_validator._error(exceptions)
+
+
+SIZES = [2, 5, 20]
+NUMBER = 20000
+
+
+def alternatives(size):
+    """ OneOf alternatives which all fail for a value except the last """
+    children = [validator.OneOf(['code-%d' % i]) for i in xrange(size - 1)]
+    return validator.Any(*(children + [validator.String()]))
+
+
+def main():
+    for size in SIZES:
+        fn = alternatives(size)
+        compiled = compile(fn)
+        for label, call in [
+                ('legacy Any, last of %d passes', lambda: legacy_validate(fn, 'x')),
+                ('Any, last of %d passes', lambda: fn._validate('x')),
+                ('compiled Any, last of %d passes', lambda: compiled._validate('x')),
+                ('legacy Any, all %d fail', lambda: legacy_validate(fn, 1)),
+                ('Any, all %d fail', lambda: fn._validate(1)),
+                ('compiled Any, all %d fail', lambda: compiled._validate(1))]:
+            report(label % size, per_call(call, number=NUMBER))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Cost of validating numeric columns with the NumPy validate_array path,
+compared with a scalar is_valid loop. Requires NumPy.
+"""
+
+from validatish import validator
+from validatish.benchmarks import per_call, report
+
+import numpy
+
+
+SIZES = [1000, 100000, 10000000]
+
+
+def main():
+    for size in SIZES:
+        numbers = numpy.random.uniform(-10, 110, size)
+        integers = numpy.round(numbers)
+        strings = numpy.array(['x' * (i % 12) for i in xrange(min(size, 100000))])
+        strings = numpy.resize(strings, size)
+        cases = [
+            ('Range', validator.Range(min=0, max=100), numbers),
+            ('Number', validator.Number(), numbers),
+            ('Integer', validator.Integer(), integers),
+            ('Length', validator.Length(min=1, max=10), strings),
+        ]
+        repeat = 3 if size < 10000000 else 1
+        for label, v, values in cases:
+            scalar = per_call(lambda: [v.is_valid(x) for x in values], number=1, repeat=repeat)
+            vector = per_call(lambda: v.validate_array(values), number=1, repeat=repeat)
+            report('%s scalar loop (%d values, usec/value)' % (label, size), scalar / size)
+            report('%s validate_array (%d values, usec/value)' % (label, size), vector / size)
+
+
+if __name__ == '__main__':
+    main()
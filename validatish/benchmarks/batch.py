@@ -0,0 +1,36 @@
+"""
+Per-item cost of validating a batch of values with Validator.validate_many,
+compared with calling the validator in a try/except loop.
+"""
+
+from validatish import validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def loop(v, values):
+    failures = []
+    for index, value in enumerate(values):
+        try:
+            v(value)
+        except Invalid, e:
+            failures.append((index, e))
+    return failures
+
+
+def main():
+    size = 10000
+    v = validator.All(validator.Required(), validator.String(), validator.Length(max=8))
+    # Roughly 30% of the values fail.
+    values = [['abc', 'abcdefghijk', '', 'defg', 'hij', 'k', 'lmnopqrstuv', 'lmnop', 'qr', 'stu'][i % 10]
+              for i in xrange(size)]
+    report('try/except loop (per item)',
+           per_call(lambda: loop(v, values), number=10) / size)
+    report('validate_many (per item)',
+           per_call(lambda: list(v.validate_many(values)), number=10) / size)
+    report('validate_many failures_only (per item)',
+           per_call(lambda: list(v.validate_many(values, failures_only=True)), number=10) / size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Cost of the regex based validators with and without a Cached wrapper, on a
+stream of values drawn from a small set, as from common email domains or
+referrer URLs.
+"""
+
+from validatish import validator
+from validatish.benchmarks import per_call, report
+
+
+CASES = [
+    ('Email', validator.Email(),
+     ['%s@example%d.com' % (name, i) for name in ('info', 'sales') for i in range(50)]),
+    ('URL', validator.URL(),
+     ['http://www.example%d.com/path/%d' % (i, i) for i in range(100)]),
+    ('DomainName', validator.DomainName(),
+     ['mail.example%d.co.uk' % i for i in range(100)]),
+    ('PlainText', validator.PlainText(extra='-_'),
+     ['user-name_%d' % i for i in range(100)]),
+]
+
+
+def run(v, values):
+    for value in values:
+        v.is_valid(value)
+
+
+def main():
+    for label, v, values in CASES:
+        cached = validator.Cached(v, maxsize=1000)
+        report('%s (100 values)' % label, per_call(lambda: run(v, values), number=1000) / 100)
+        report('Cached %s (100 values)' % label, per_call(lambda: run(cached, values), number=1000) / 100)
+        print('  %s' % (cached.cache_info(),))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-call cost of a composed validator tree before and after compiling it
+with validatish.compile.
+"""
+
+from validatish import compile, validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def call(v, value):
+    try:
+        v(value)
+    except Invalid:
+        pass
+
+
+def tree():
+    return validator.All(
+        validator.Required(),
+        validator.String(),
+        validator.Length(min=3, max=64),
+        validator.Any(validator.Email(), validator.PlainText(extra='-_.')),
+    )
+
+
+VALUES = [
+    ('pass', 'info@example.com'),
+    ('pass second alternative', 'user-name_1'),
+    ('fail', 'no way!'),
+]
+
+
+def main():
+    v = tree()
+    compiled = compile(v)
+    for label, value in VALUES:
+        report('tree (%s)' % label, per_call(lambda: call(v, value)))
+        report('compiled (%s)' % label, per_call(lambda: call(compiled, value)))
+        report('tree is_valid (%s)' % label, per_call(lambda: v.is_valid(value)))
+        report('compiled is_valid (%s)' % label, per_call(lambda: compiled.is_valid(value)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Domain name checking time from 10 to 1,000,000 characters, for valid and
+hostile values, comparing the old regex with the scanner.
+
+The scanner's time per character is flat as the length grows, and with
+DomainName(max_length=...) the total time is flat.
+"""
+
+import re
+
+from validatish import validate, validator
+from validatish.benchmarks import per_call, report
+
+
+# The 0.6.3 domain name regex.
+legacy_domain_name_regex = re.compile(r"^[a-z0-9][a-z0-9\.\-_]*\.[a-z]+$", re.I)
+
+LENGTHS = [10, 100, 1000, 10000, 100000, 1000000]
+
+KINDS = [
+    ('valid', lambda n: 'a' * (n - 4) + '.com'),
+    ('many dots, bad tld', lambda n: ('a.' * n)[:n - 1] + '1'),
+    ('bad first character', lambda n: '-' + 'a' * (n - 5) + '.com'),
+]
+
+
+def main():
+    capped = validator.DomainName(max_length=253)
+    for label, make in KINDS:
+        for n in LENGTHS:
+            value = make(n)
+            number = max(1, 100000 / n)
+            regex = per_call(lambda: legacy_domain_name_regex.match(value), number=number)
+            scanner = per_call(lambda: validate._is_domain_name(value), number=number)
+            report('regex %s, %d characters (per character)' % (label, n), regex / n)
+            report('scanner %s, %d characters (per character)' % (label, n), scanner / n)
+            report('DomainName(max_length=253) %s, %d characters' % (label, n),
+                   per_call(lambda: capped.is_valid(value), number=number))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Email username checking on normal and adversarial values, comparing the old
+alternation regex with the single pass scanner, plus the cost of rejecting a
+64KB address with Email(max_length=...).
+
+The old regex backtracks exponentially when a username of letters ends with a
+bad character, as every letter matches both [a-z] and [A-Z] under re.I, so it
+is only timed on short usernames.
+"""
+
+import re
+
+from validatish import validate, validator
+from validatish.benchmarks import per_call, report
+
+
+# The 0.6.3 username regex.
+legacy_user_regex = re.compile(r"(\.|\!|\#|\$|\%|\&|\'|\*|\+|\-|\/|\=|\?|\^|\_|\`|\{|\||\}|[a-z]|[A-Z]|[0-9])+$", re.I)
+
+_long = 'a' * 65536
+
+
+def main():
+    report('regex short username', per_call(lambda: legacy_user_regex.match('info')))
+    report('scanner short username', per_call(lambda: validate._is_email_user('info')))
+    for n in (8, 12, 16):
+        username = 'a' * n + ','
+        report('regex %d character username, bad last character' % n,
+               per_call(lambda: legacy_user_regex.match(username), number=10, repeat=3))
+        report('scanner %d character username, bad last character' % n,
+               per_call(lambda: validate._is_email_user(username)))
+    for label, username in [('64KB username', _long),
+                            ('64KB username, bad last character', _long + ','),
+                            ('64KB username, bad first character', ',' + _long)]:
+        report('scanner %s' % label,
+               per_call(lambda: validate._is_email_user(username), number=100))
+    address = _long + ',@example.com'
+    email = validator.Email()
+    capped = validator.Email(max_length=254)
+    report('Email() 64KB address', per_call(lambda: email.is_valid(address), number=100))
+    report('Email(max_length=254) 64KB address',
+           per_call(lambda: capped.is_valid(address), number=100))
+
+
+if __name__ == '__main__':
+    main()
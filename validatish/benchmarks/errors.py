@@ -0,0 +1,107 @@
+"""
+Cost of building Invalid exceptions for failing values: time per failure and
+the memory each retained exception holds on to, plus the time to flatten a
+large error tree with Invalid.errors.
+
+Allocations are measured with tracemalloc where it is available. Otherwise
+(e.g. on a standard Python 2 build) the benchmark reports the number of
+garbage collected objects and the bytes, from sys.getsizeof, retained by each
+exception.
+"""
+
+import gc
+
+from validatish import validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report, sizeof
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+CASES = [
+    ('Required', validator.Required(), ''),
+    ('Length', validator.Length(min=2, max=5), 'abcdefgh'),
+    ('Range', validator.Range(min=1, max=10), 20),
+    ('All(Integer, Length)',
+     validator.All(validator.Integer(), validator.Length(max=5)), 'abcdefgh'),
+]
+
+COUNT = 10000
+
+
+def failures(v, value, count=COUNT):
+    return [v._validate(value) for i in xrange(count)]
+
+
+def retained(v, value, count=COUNT):
+    """
+    Return the gc tracked objects and bytes retained per exception, not
+    counting the validator, which is shared.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        before = len(gc.get_objects())
+        errors = failures(v, value, count)
+        objects = len(gc.get_objects()) - before - 1
+    finally:
+        gc.enable()
+    seen = set([id(v), id(value)])
+    seen.update(id(x) for x in gc.get_referents(v))
+    size = sum(sizeof(e, seen) for e in errors)
+    return float(objects) / count, float(size) / count
+
+
+def traced(v, value, count=COUNT):
+    """
+    Return the allocations and bytes still allocated per exception.
+    """
+    tracemalloc.start()
+    try:
+        errors = failures(v, value, count)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = snapshot.statistics('filename')
+    blocks = sum(stat.count for stat in stats)
+    size = sum(stat.size for stat in stats)
+    return float(blocks) / count, float(size) / count
+
+
+def error_tree(width=100, depth=2):
+    """
+    Build a tree of width ** depth leaf errors, like a bulk import report.
+    """
+    errors = [Invalid('must be a integer') for i in xrange(width)]
+    for i in xrange(depth - 1):
+        errors = [Invalid('; '.join(e.message for e in errors[:2]), errors)
+                  for j in xrange(width)]
+    return Invalid('Please fix', errors)
+
+
+def flatten(tree):
+    tree._details = None
+    return tree.errors
+
+
+def main():
+    for label, v, value in CASES:
+        report('%s failure' % label, per_call(lambda: v._validate(value)))
+        report('%s failure and message' % label,
+               per_call(lambda: v._validate(value).message))
+        if tracemalloc is not None:
+            blocks, size = traced(v, value)
+            print('%-60s %10.1f allocations %8.1f bytes' % (label, blocks, size))
+        else:
+            objects, size = retained(v, value)
+            print('%-60s %10.1f objects %8.1f bytes' % (label, objects, size))
+    tree = error_tree()
+    report('errors of a tree of 10000 leaves', per_call(lambda: flatten(tree), number=10))
+    report('cached errors of a tree of 10000 leaves', per_call(lambda: tree.errors, number=10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Per-call cost of Validator.is_valid compared with calling the validator and
+catching Invalid, on passing and failing values.
+"""
+
+from validatish import validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def try_call(v, value):
+    try:
+        v(value)
+    except Invalid:
+        return False
+    return True
+
+
+CASES = [
+    ('Required', validator.Required(), 'x', ''),
+    ('Integer', validator.Integer(), 1, 'x'),
+    ('Length', validator.Length(min=2, max=5), 'abc', 'abcdefgh'),
+    ('Email', validator.Email(), 'info@example.com', 'info@example'),
+    ('All(Required, String, Length)',
+     validator.All(validator.Required(), validator.String(), validator.Length(max=5)),
+     'abc', 'abcdefgh'),
+    ('Any(Integer, Email)',
+     validator.Any(validator.Integer(), validator.Email()),
+     'info@example.com', 'info@example'),
+]
+
+
+def main():
+    for label, v, good, bad in CASES:
+        report('try/except %s (pass)' % label, per_call(lambda: try_call(v, good)))
+        report('is_valid %s (pass)' % label, per_call(lambda: v.is_valid(good)))
+        report('try/except %s (fail)' % label, per_call(lambda: try_call(v, bad)))
+        report('is_valid %s (fail)' % label, per_call(lambda: v.is_valid(bad)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Validating 1M flat records with Mapping, compared with a hand-rolled loop over
+a dict of field validators which catches Invalid and collects the errors.
+"""
+
+import sys
+import timeit
+
+from validatish import validator
+from validatish.error import Invalid
+
+
+COUNT = 1000000
+
+fields = {
+    'name': validator.All(validator.Required(), validator.String(), validator.Length(max=64)),
+    'email': validator.All(validator.Required(), validator.Email()),
+    'age': validator.All(validator.Integer(), validator.Range(min=0, max=150)),
+    'country': validator.OneOf(['GB', 'FR', 'DE', 'US']),
+    'homepage': validator.URL(),
+}
+
+mapping = validator.Mapping(fields)
+
+
+def record(i):
+    if i % 10:
+        return {'name': 'user%d' % i, 'email': 'user%d@example.com' % i, 'age': i % 100,
+                'country': 'GB', 'homepage': 'http://example.com/%d' % i}
+    # One in ten records has bad fields.
+    return {'name': '', 'email': 'user%d' % i, 'age': 'old', 'country': 'XX'}
+
+
+def hand_rolled(records):
+    results = []
+    for index, r in enumerate(records):
+        errors = {}
+        for key, v in fields.items():
+            try:
+                v(r.get(key))
+            except Invalid, e:
+                errors[key] = e
+        if errors:
+            results.append((index, errors))
+    return results
+
+
+def with_mapping(records):
+    return list(mapping.validate_many(records, failures_only=True))
+
+
+def main():
+    count = len(sys.argv) > 1 and int(sys.argv[1]) or COUNT
+    records = [record(i) for i in xrange(count)]
+    for label, fn in [('hand rolled loop', hand_rolled), ('Mapping.validate_many', with_mapping)]:
+        seconds = min(timeit.repeat(lambda: fn(records), number=1, repeat=3))
+        print('%-60s %10.0f records/sec' % (label, count / seconds))
+
+
+if __name__ == '__main__':
+    main()
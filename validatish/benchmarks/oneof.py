@@ -0,0 +1,47 @@
+"""
+Per-call cost of OneOf membership checks as the set of values grows,
+comparing the old set-per-call implementation with the prebuilt index.
+"""
+
+from validatish import validate, validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def legacy_is_one_of(v, set_of_values, messages=None):
+    """ The 0.6.3 implementation, building a set on every call """
+    if v is None:
+        return
+    _messages = {
+        'one-of-empty': "must be one of []",
+        'one-of': "must be one of %(values)r",
+    }
+    if messages:
+        _messages.update(messages)
+    if not set_of_values:
+        raise Invalid(_messages['one-of-empty'])
+    if isinstance(v,list):
+        v = tuple(v)
+    if v not in set(set_of_values):
+        raise Invalid(_messages['one-of']%{'values':set_of_values})
+
+
+SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+
+
+def main():
+    for size in SIZES:
+        values = ['value-%d' % i for i in xrange(size)]
+        value = values[-1]
+        one_of = validator.OneOf(values)
+        number = max(1, 100000 // size)
+        report('legacy is_one_of (%d values)' % size,
+               per_call(lambda: legacy_is_one_of(value, values), number=number))
+        report('is_one_of (%d values)' % size,
+               per_call(lambda: validate.is_one_of(value, values), number=number))
+        report('OneOf (%d values)' % size,
+               per_call(lambda: one_of(value)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Throughput of validate_parallel compared with validate_many on a batch of
+emails and urls, for 1, 2 and 4 worker processes. The speed up depends on the
+number of CPUs.
+"""
+
+import multiprocessing
+import timeit
+
+from validatish import validate_parallel, validator
+
+
+COUNT = 200000
+
+tree = validator.All(validator.Required(), validator.String(),
+                     validator.Any(validator.Email(), validator.URL(with_scheme=True)))
+values = ['info%d@example.com' % i for i in xrange(COUNT / 2)] + \
+         ['http://example.com/%d' % i for i in xrange(COUNT / 4)] + \
+         ['not valid %d' % i for i in xrange(COUNT / 4)]
+
+
+def consume(results):
+    for result in results:
+        pass
+
+
+def report(label, seconds):
+    print('%-60s %10.0f values/sec' % (label, COUNT / seconds))
+
+
+def main():
+    print('%d CPUs' % multiprocessing.cpu_count())
+    report('validate_many', min(timeit.repeat(
+        lambda: consume(tree.validate_many(values)), number=1, repeat=3)))
+    for workers in (1, 2, 4):
+        report('validate_parallel, %d workers' % workers, min(timeit.repeat(
+            lambda: consume(validate_parallel(tree, values, workers=workers)),
+            number=1, repeat=3)))
+        report('validate_parallel, %d workers, failures only' % workers, min(timeit.repeat(
+            lambda: consume(validate_parallel(tree, values, workers=workers, failures_only=True)),
+            number=1, repeat=3)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-call cost of plain text validation, comparing the old compile-per-call
+implementation with the cached functional and precompiled class paths.
+"""
+
+import re
+
+from validatish import validate, validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def legacy_is_plaintext(v,extra=None, messages=None):
+    """ The 0.6.3 implementation, recompiling the pattern on every call """
+    if v is None:
+        return
+    if extra:
+        extra.replace('-','\\-')
+    regex = r"^[a-zA-Z0-9%s]*$"%extra
+
+    _messages = {
+        'type-string': "must be a string",
+        'characters-and-numbers': "must consist of characters and numbers only",
+        'characters-and-numbers-extra': "must consist of characters and numbers plus any of %(extra)s",
+    }
+    if messages:
+        _messages.update(messages)
+
+    if not isinstance(v,basestring):
+        raise Invalid(_messages['type-string'])
+
+    msg = _messages['characters-and-numbers']
+    if extra is not None:
+        msg = _messages['characters-and-numbers-extra']%{'extra':extra}
+
+    p = re.compile(regex, re.UNICODE)
+    if not p.match(v):
+        raise Invalid(msg)
+
+
+VALUES = [
+    ('ascii', 'abcdef_GHIJ0123456789'),
+    ('unicode', u'abcdef_GHIJ0123456789'),
+]
+
+
+def main():
+    plaintext = validator.PlainText(extra='_')
+    for label, value in VALUES:
+        report('legacy is_plaintext (%s)' % label,
+               per_call(lambda: legacy_is_plaintext(value, extra='_')))
+        report('is_plaintext (%s)' % label,
+               per_call(lambda: validate.is_plaintext(value, extra='_')))
+        report('PlainText (%s)' % label,
+               per_call(lambda: plaintext(value)))
+
+
+if __name__ == '__main__':
+    main()
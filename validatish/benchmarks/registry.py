@@ -0,0 +1,53 @@
+"""
+Memory used by a large registry of per-field validators, as kept by long
+lived processes, with and without interning identical validators.
+"""
+
+from validatish import validator
+from validatish.benchmarks import sizeof
+
+
+COUNT = 100000
+
+
+def field_validator(i):
+    """ A typical mix of field validators, with some configuration """
+    kind = i % 4
+    if kind == 0:
+        return validator.Required()
+    if kind == 1:
+        return validator.Length(max=i % 50 + 10)
+    if kind == 2:
+        return validator.All(validator.Required(), validator.Email())
+    return validator.All(validator.Required(), validator.Range(min=0, max=i % 10))
+
+
+def registry(count=COUNT, intern=False):
+    fields = {}
+    interned = {}
+    for i in xrange(count):
+        v = field_validator(i)
+        if intern:
+            v = interned.setdefault(v, v)
+        fields['field%d' % i] = v
+    return fields
+
+
+def per_validator(fields):
+    seen = set()
+    # Only count the validators, not the field names or the registry itself.
+    for name in fields:
+        seen.add(id(name))
+    return float(sum(sizeof(v, seen) for v in fields.values())) / len(fields)
+
+
+def main():
+    fields = registry()
+    print('%-60s %10.2f bytes' % ('validator', per_validator(fields)))
+    fields = registry(intern=True)
+    print('%-60s %10.2f bytes (%d distinct)' % ('interned validator',
+            per_validator(fields), len(set(map(id, fields.values())))))
+
+
+if __name__ == '__main__':
+    main()
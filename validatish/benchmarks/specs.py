@@ -0,0 +1,54 @@
+"""
+Startup cost of a service's validators: building them in Python, from a JSON
+spec, and loading the spec again from the load_spec cache. Also the cost of
+constructing a OneOf of a large set of values, whose index is built lazily.
+"""
+
+import json
+import timeit
+
+from validatish import validate, validator
+from validatish.spec import from_spec, load_spec, to_spec
+
+
+FIELDS = 1000
+VALUES = 1000000
+
+
+def form(fields=FIELDS):
+    """ A Mapping of a typical mix of field validators """
+    validators = {}
+    for i in xrange(fields):
+        kind = i % 4
+        if kind == 0:
+            v = validator.All(validator.Required(), validator.Length(max=i % 50 + 10))
+        elif kind == 1:
+            v = validator.All(validator.Required(), validator.Email())
+        elif kind == 2:
+            v = validator.All(validator.Integer(), validator.Range(min=0, max=i))
+        else:
+            v = validator.OneOf(['a', 'b', 'c'])
+        validators['field%d' % i] = v
+    return validator.Mapping(validators)
+
+
+def best(fn, number=1):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main():
+    text = json.dumps(to_spec(form()))
+    load_spec(text)
+    for label, fn in [('build in Python', form),
+                      ('from_spec(json.loads(text))', lambda: from_spec(json.loads(text))),
+                      ('load_spec(text), cached', lambda: load_spec(text))]:
+        print('%-60s %10.3f msec' % ('%d fields: %s' % (FIELDS, label), best(fn) * 1000))
+
+    values = range(VALUES)
+    for label, fn in [('eager index', lambda: validate._one_of_index(values)),
+                      ('OneOf, lazy index', lambda: validator.OneOf(values))]:
+        print('%-60s %10.3f msec' % ('%d values: %s' % (VALUES, label), best(fn) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+The benchmark suite: every functional validator and validator class on
+passing, failing and adversarial values, plus composed validator trees.
+"""
+
+import platform
+import sys
+
+from validatish import compile, validate, validator
+from validatish.error import Invalid
+from validatish.benchmarks import calibrated
+
+
+# Adversarial values: long hostile inputs for the regex based validators.
+_long = 'a' * 65536
+_dots = '.'.join(['a'] * 32768) + '.1'
+
+# (name, function validator, class validator, passing, failing, adversarial)
+_validators = [
+    ('required', validate.is_required, validator.Required(), 'x', '', None),
+    ('string', validate.is_string, validator.String(), 'x', 1, None),
+    ('plaintext', validate.is_plaintext, validator.PlainText(), 'abc123', 'abc 123', _long + '!'),
+    ('integer', validate.is_integer, validator.Integer(), 12, 'x', None),
+    ('number', validate.is_number, validator.Number(), 1.5, '1.5', None),
+    ('email', validate.is_email, validator.Email(), 'info@example.com', 'info@example',
+     _long + '@' + _dots),
+    ('domain_name', validate.is_domain_name, validator.DomainName(), 'example.co.uk', 'example',
+     _dots),
+    ('url', validate.is_url, validator.URL(), 'http://www.example.com/path', 'http://exa mple',
+     'http://' + _dots),
+    ('equal', lambda v: validate.is_equal(v, 'x'), validator.Equal('x'), 'x', 'y', None),
+    ('one_of', lambda v: validate.is_one_of(v, range(1000)), validator.OneOf(range(1000)),
+     999, 1000, None),
+    ('length', lambda v: validate.has_length(v, min=2, max=10), validator.Length(min=2, max=10),
+     'abc', 'a' * 20, _long),
+    ('in_range', lambda v: validate.is_in_range(v, min=0, max=100), validator.Range(min=0, max=100),
+     50, 150, None),
+]
+
+
+def _tree():
+    return validator.All(
+        validator.Required(),
+        validator.String(),
+        validator.Length(min=3, max=64),
+        validator.Any(validator.Email(), validator.URL(with_scheme=True),
+                      validator.PlainText(extra='-_.')),
+    )
+
+# (name, validator, passing, failing)
+_trees = [
+    ('all', validator.All(validator.Required(), validator.String(), validator.Length(max=10)),
+     'abc', 'a' * 20),
+    ('any', validator.Any(validator.Integer(), validator.Email(), validator.URL()),
+     'http://example.com', 1.5),
+    ('tree', _tree(), 'user-name_1', 'no way!'),
+    ('compiled_tree', compile(_tree()), 'user-name_1', 'no way!'),
+    ('cached_tree', validator.Cached(_tree()), 'user-name_1', 'no way!'),
+]
+
+
+def _call(fn, value):
+    try:
+        fn(value)
+    except Invalid:
+        pass
+
+
+def cases():
+    """
+    Return the list of (name, function) benchmark cases.
+    """
+    result = []
+    def add(name, fn, value):
+        result.append((name, lambda: _call(fn, value)))
+    for name, fn, cls, good, bad, hostile in _validators:
+        for kind, value in (('pass', good), ('fail', bad), ('adversarial', hostile)):
+            if kind == 'adversarial' and hostile is None:
+                continue
+            add('validate.%s.%s' % (name, kind), fn, value)
+            add('validator.%s.%s' % (name, kind), cls, value)
+            result.append(('validator.%s.is_valid.%s' % (name, kind),
+                           lambda cls=cls, value=value: cls.is_valid(value)))
+    for name, v, good, bad in _trees:
+        for kind, value in (('pass', good), ('fail', bad)):
+            add('compound.%s.%s' % (name, kind), v, value)
+            result.append(('compound.%s.is_valid.%s' % (name, kind),
+                           lambda v=v, value=value: v.is_valid(value)))
+    return result
+
+
+def run(match=None, duration=0.05, repeat=5, progress=None):
+    """
+    Run the benchmarks, optionally only those whose name contains match, and
+    return the results as a dict suitable for JSON.
+    """
+    results = {}
+    for name, fn in cases():
+        if match and match not in name:
+            continue
+        results[name] = calibrated(fn, duration=duration, repeat=repeat)
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'unit': 'usec',
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compare two sets of results, returning a sorted list of
+    (name, baseline usec, current usec, ratio) for the benchmarks which are
+    slower than the baseline by more than the threshold (a fraction).
+    """
+    regressions = []
+    for name, usec in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        ratio = usec / base
+        if ratio > 1 + threshold:
+            regressions.append((name, base, usec, ratio))
+    return sorted(regressions)
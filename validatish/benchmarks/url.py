@@ -0,0 +1,62 @@
+"""
+Per-call cost of url validation, comparing the old compile-per-call
+implementation with the cached functional and precompiled class paths.
+"""
+
+import re
+
+from validatish import validate, validator
+from validatish.error import Invalid
+from validatish.benchmarks import per_call, report
+
+
+def legacy_is_url(v, full=True, absolute=True, relative=True, with_scheme=False, messages=None):
+    """ The 0.6.3 implementation, recompiling the pattern on every call """
+    _messages = { 'type-url': "must be a url" }
+    if messages:
+        _messages.update(messages)
+
+    if v is None:
+        return
+    if not isinstance(v,basestring):
+        raise Invalid(_messages['type-url'])
+
+    exp = []
+    if full:
+        exp.append(r"(https?://)([a-z0-9][a-z0-9\-\.\_]*\.[a-z]+)(:[0-9]+)?(/.*)?")
+    if absolute and not with_scheme:
+        exp.append('/.*')
+    if relative and not with_scheme:
+        exp.append('[^/(https?://)].*')
+
+    urlRE = re.compile('^('+')$|^('.join(exp)+')$', re.I)
+
+    if not urlRE.search(v):
+        raise Invalid(_messages['type-url'])
+
+
+VALUES = [
+    ('full', 'http://www.example.com:8080/some/path?q=1'),
+    ('absolute', '/some/path'),
+    ('relative', 'foo/bar'),
+]
+
+
+def main():
+    url = validator.URL()
+    for label, value in VALUES:
+        report('legacy is_url (%s)' % label,
+               per_call(lambda: legacy_is_url(value)))
+        report('is_url (%s)' % label,
+               per_call(lambda: validate.is_url(value)))
+        report('URL (%s)' % label,
+               per_call(lambda: url(value)))
+    value = 'http://www.example.com/'
+    report('legacy is_url (with_scheme)',
+           per_call(lambda: legacy_is_url(value, with_scheme=True)))
+    report('is_url (with_scheme)',
+           per_call(lambda: validate.is_url(value, with_scheme=True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Validate the records of a CSV or JSON lines file from the command line::
+
+    python -m validatish myapp.validators:customer customers.csv -o failures.txt
+    zcat orders.jsonl.gz | validatish myapp.validators:order --format jsonl
+
+The spec names a validator as module:attribute, or is a JSON spec file as
+read by validatish.load_spec. It is normally a Mapping of column to
+validator; a dict is wrapped in a Mapping and a plain function in an All.
+Records are read and validated one at a time, so memory use does not depend
+on the size of the file.
+
+CSV values are always strings, so columns checked with e.g. Integer, Number
+or Range must be converted with --type COLUMN:TYPE, where TYPE is int or
+float. Empty values of the converted columns are read as None.
+
+Each failure is written to the report as a tab separated line of the record
+number, counting from 1, the field path and the message. A JSON line which
+cannot be decoded is reported as a failure of that record. Text is written as
+UTF-8. A summary with the counts and throughput is written at the end of the
+report, as a line starting with '# ', and to stderr. The exit status is 1 if
+any record failed.
+"""
+
+import csv
+import json
+import optparse
+import sys
+import time
+
+from validatish.error import Invalid
+from validatish.parallel import validate_parallel
+from validatish.spec import load_spec
+from validatish.validator import All, Mapping, Validator, _is_valid, _validate
+
+
+def load_validator(spec):
+    """
+    Load the validator from a JSON spec file or import the one named by
+    spec, as module:attribute.
+    """
+    if spec.endswith('.json'):
+        f = open(spec)
+        try:
+            return load_spec(f.read())
+        finally:
+            f.close()
+    if ':' in spec:
+        module_name, name = spec.split(':', 1)
+    else:
+        module_name, name = spec.rsplit('.', 1)
+    module = __import__(module_name, {}, {}, [name])
+    validator = getattr(module, name)
+    if isinstance(validator, dict):
+        validator = Mapping(validator)
+    elif not isinstance(validator, Validator):
+        validator = All(validator)
+    return validator
+
+
+def csv_records(f):
+    return csv.DictReader(f)
+
+
+class Malformed(object):
+    """ A record which could not be read, in place of its values """
+
+    def __init__(self, error):
+        self.error = error
+
+
+def jsonl_records(f):
+    for line in f:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError, e:
+                yield Malformed('is not valid JSON: %s'%(e,))
+
+
+_readers = {
+    'csv': csv_records,
+    'jsonl': jsonl_records,
+}
+
+
+# The types columns can be converted to with --type.
+_types = {
+    'int': int,
+    'float': float,
+}
+
+
+def convert_columns(records, types):
+    """
+    Convert the values of the columns named by types, a dict of column to
+    type. Empty values become None and values which cannot be converted are
+    left for the validator to reject.
+    """
+    for record in records:
+        if not isinstance(record, Malformed):
+            for column, type_ in types.iteritems():
+                value = record.get(column)
+                if value == '':
+                    record[column] = None
+                elif value is not None:
+                    try:
+                        record[column] = type_(value)
+                    except (TypeError, ValueError):
+                        pass
+        yield record
+
+
+class RecordValidator(Validator):
+    """ Reports Malformed records, validating the others with validator """
+
+    __slots__ = ('validator',)
+
+    def __init__(self, validator):
+        self.validator = validator
+
+    def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def _validate(self, v):
+        if isinstance(v, Malformed):
+            return Invalid(v.error, validator=self)
+        return _validate(self.validator, v)
+
+    def is_valid(self, v):
+        if isinstance(v, Malformed):
+            return False
+        return _is_valid(self.validator, v)
+
+    def __reduce__(self):
+        return RecordValidator, (self.validator,)
+
+
+def _format(filename):
+    if filename.endswith('.jsonl') or filename.endswith('.json'):
+        return 'jsonl'
+    return 'csv'
+
+
+def report_failures(results, out):
+    """
+    Write each failure from (index, error) results to out, returning the
+    number of failed records.
+    """
+    failed = 0
+    for index, error in results:
+        if error is None:
+            continue
+        failed += 1
+        for path, message, validator in error.error_details:
+            out.write('%d\t%s\t%s\n'%(index + 1, '.'.join(_encode(key) for key in path),
+                                      _encode(message)))
+    return failed
+
+
+def _encode(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+class _Counted(object):
+    """ Counts the records read, for failures_only results """
+
+    def __init__(self, records):
+        self.records = records
+        self.count = 0
+
+    def __iter__(self):
+        for record in self.records:
+            self.count += 1
+            yield record
+
+
+def main(args=None):
+    parser = optparse.OptionParser(prog='validatish', usage='%prog [options] SPEC [FILE]',
+                                   description='Validate each record of FILE, or stdin, with '
+                                   'the validator SPEC (module:attribute or a JSON spec file).')
+    parser.add_option('-f', '--format', choices=sorted(_readers),
+                      help='csv or jsonl, by default from the file extension or csv')
+    parser.add_option('-o', '--output', help='write the failures to this file [stdout]')
+    parser.add_option('-w', '--workers', type='int', default=0,
+                      help='validate in this many processes [%default, in this process]')
+    parser.add_option('-c', '--chunksize', type='int', default=1000,
+                      help='records sent to a worker at a time [%default]')
+    parser.add_option('-t', '--type', action='append', default=[], metavar='COLUMN:TYPE',
+                      help='convert the values of a column to int or float; CSV values '
+                      'are otherwise strings. May be repeated')
+    options, args = parser.parse_args(args)
+    if len(args) not in (1, 2):
+        parser.error('expected a SPEC and an optional FILE')
+    types = {}
+    for option in options.type:
+        column, sep, name = option.rpartition(':')
+        if not sep or name not in _types:
+            parser.error('expected --type COLUMN:int or COLUMN:float, not %s'%(option,))
+        types[column] = _types[name]
+
+    try:
+        validator = RecordValidator(load_validator(args[0]))
+    except (ImportError, AttributeError, IOError, ValueError), e:
+        parser.error('cannot load %s: %s'%(args[0], e))
+    filename = len(args) == 2 and args[1] or '-'
+    format = options.format or _format(filename)
+
+    if filename == '-':
+        f = sys.stdin
+    else:
+        f = open(filename, 'rb')
+    if options.output:
+        out = open(options.output, 'w')
+    else:
+        out = sys.stdout
+    start = time.time()
+    try:
+        records = _readers[format](f)
+        if types:
+            records = convert_columns(records, types)
+        records = _Counted(records)
+        if options.workers:
+            results = validate_parallel(validator, records, workers=options.workers,
+                                        chunksize=options.chunksize, failures_only=True)
+        else:
+            results = validator.validate_many(records, failures_only=True)
+        failed = report_failures(results, out)
+        seconds = time.time() - start
+        summary = '%d records, %d failed, %.1f seconds, %.0f records/sec\n'%(
+            records.count, failed, seconds, records.count / max(seconds, 1e-6))
+        out.write('# ' + summary)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        if out is not sys.stdout:
+            out.close()
+
+    sys.stderr.write(summary)
+    if failed:
+        return 1
+    return 0
@@ -0,0 +1,233 @@
+"""
+Compile a tree of validators into a single specialised validator.
+
+Calling a validator tree dispatches through several methods per node and the
+compound validators look up each child's protocol on every call. compile walks
+the tree once and builds closures over the checks themselves, calling the
+validatish.validate functions directly where the validator has no
+configuration, so each call does the minimum of work while producing exactly
+the same Invalid as the original tree.
+"""
+
+from functools import partial
+
+from validatish import validate
+from validatish.validator import All, Always, Any, DomainName, Email, \
+        Equal, Integer, Length, Number, OneOf, PlainText, Range, Required, \
+        String, URL, _Immutable, _set, _validate, _is_valid
+
+
+# Leaf validators whose check takes no configuration, so the validate function
+# can be called without going through the validator's _check method.
+_direct_checks = {
+    Required: validate._check_required,
+    String: validate._check_string,
+    Integer: validate._check_integer,
+    Number: validate._check_number,
+}
+
+# The leaf validators compiled to their checks. Subclasses may override
+# __call__ or _validate, so are called as normal.
+_builtin_leaves = frozenset([
+    DomainName, Email, Equal, Integer, Length, Number, OneOf, PlainText,
+    Range, Required, String, URL,
+])
+
+# Returned by compiled checks when a compound validator or a validator without
+# a _check fails. The checks only ever test for None.
+_FAILED = ('failed', None)
+
+
+def compile(validator):
+    """
+    Compile a validator tree into a single validator.
+
+    The compiled validator raises the same Invalid (message, exceptions and
+    validators) as the original and supports is_valid and validate_many. The
+    tree, including the All.default_fail_fast, is captured at compile time so
+    it should not be modified afterwards. Custom validators and plain
+    functions in the tree are called as normal.
+    """
+    return CompiledValidator(validator)
+
+
+class CompiledValidator(_Immutable):
+    """ A validator tree compiled by validatish.compile """
+
+    __slots__ = ('validator', '_validate', '_check')
+
+    def __init__(self, validator):
+        if isinstance(validator, CompiledValidator):
+            validator = validator.validator
+        _set(self, 'validator', validator)
+        _set(self, '_validate', _compile_validate(validator))
+        _set(self, '_check', _compile_check(validator))
+
+    def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def is_valid(self, v):
+        return self._check(v) is None
+
+    def _config(self):
+        return (self.validator,), {}
+
+    def __repr__(self):
+        return 'validatish.compile(%r)'%(self.validator,)
+
+
+def _pass(v):
+    return None
+
+
+def _until_always(validators):
+    """
+    Return the validators of an Any up to and including the first Always,
+    after which none are run. Those before it still run, as they may raise.
+    """
+    for index, validator in enumerate(validators):
+        if type(validator) is Always:
+            return validators[:index + 1]
+    return validators
+
+
+def _leaf_check(validator):
+    check = _direct_checks.get(type(validator))
+    if check is None:
+        check = validator._check
+    return check
+
+
+def _compile_validate(validator):
+    """
+    Return a function of the value returning the unraised Invalid or None.
+    """
+    if isinstance(validator, CompiledValidator):
+        return validator._validate
+    if type(validator) is Always:
+        return _pass
+
+    if type(validator) is All:
+        error = validator._error
+        children = [_compile_validate(child) for child in validator.validators]
+        if validator.fail_fast:
+            def validate_all_fail_fast(v):
+                for child in children:
+                    e = child(v)
+                    if e is not None:
+                        return error([e])
+            return validate_all_fail_fast
+        def validate_all(v):
+            exceptions = None
+            for child in children:
+                e = child(v)
+                if e is not None:
+                    if exceptions is None:
+                        exceptions = [e]
+                    else:
+                        exceptions.append(e)
+            if exceptions is not None:
+                return error(exceptions)
+        return validate_all
+
+    if type(validator) is Any:
+        validators = _until_always(validator.validators)
+        if validators and type(validators[0]) is Always:
+            return _pass
+        error = validator._error
+        children = [_compile_failure(child) for child in validators]
+        def validate_any(v):
+            # Each child is checked once and the exceptions are only built
+            # once every child has failed.
+            failures = []
+            for child, build in children:
+                failure = child(v)
+                if failure is None:
+                    return None
+                failures.append(failure)
+            exceptions = []
+            for (child, build), failure in zip(children, failures):
+                if build is not None:
+                    failure = build(failure)
+                exceptions.append(failure)
+            return error(exceptions)
+        return validate_any
+
+    if type(validator) in _builtin_leaves:
+        check = _leaf_check(validator)
+        defaults = validator._messages
+        messages = validator.messages
+        invalid = validate._invalid
+        def validate_leaf(v):
+            error = check(v)
+            if error is not None:
+                return invalid(defaults, messages, error, validator)
+        return validate_leaf
+
+    return partial(_validate, validator)
+
+
+def _compile_failure(validator):
+    """
+    Return a function of the value returning None or the validator's failure,
+    and a function building the Invalid from the failure, or None if the
+    failure is already the Invalid. Built-in leaves return their error tuple
+    so no Invalid is built unless it is needed.
+    """
+    if type(validator) in _builtin_leaves:
+        defaults = validator._messages
+        messages = validator.messages
+        invalid = validate._invalid
+        def build(error):
+            return invalid(defaults, messages, error, validator)
+        return _leaf_check(validator), build
+    return _compile_validate(validator), None
+
+
+def _compile_check(validator):
+    """
+    Return a function of the value returning None if it is valid, otherwise
+    an error. No exceptions or messages are built.
+    """
+    if isinstance(validator, CompiledValidator):
+        return validator._check
+    if type(validator) is Always:
+        return _pass
+
+    if type(validator) is All:
+        children = [_compile_check(child) for child in validator.validators
+                    if type(child) is not Always]
+        if not children:
+            return _pass
+        if len(children) == 1:
+            return children[0]
+        def check_all(v):
+            for child in children:
+                error = child(v)
+                if error is not None:
+                    return error
+        return check_all
+
+    if type(validator) is Any:
+        validators = _until_always(validator.validators)
+        if validators and type(validators[0]) is Always:
+            return _pass
+        children = [_compile_check(child) for child in validators]
+        if len(children) == 1:
+            return children[0]
+        def check_any(v):
+            for child in children:
+                if child(v) is None:
+                    return None
+            return _FAILED
+        return check_any
+
+    if type(validator) in _builtin_leaves:
+        return _leaf_check(validator)
+
+    def check(v):
+        if not _is_valid(validator, v):
+            return _FAILED
+    return check
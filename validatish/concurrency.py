@@ -0,0 +1,145 @@
+"""
+Concurrent validation of I/O bound checks.
+
+Checks such as MX lookups, uniqueness against a database or remote blocklists
+spend their time waiting. Implement them as AsyncValidator subclasses and
+combine them with ConcurrentAll or ConcurrentAny, which run the AsyncValidator
+children at the same time, each in its own thread, while the other children
+(e.g. the built-in validators) are run inline first::
+
+    validator = ConcurrentAll(Required(), Email(), HasMXRecord(), NotBlocked())
+
+The AsyncValidator children are only started if the inline children have not
+already decided the result.
+"""
+
+import Queue
+import sys
+import threading
+
+from validatish.validator import All, Any, Validator, _validate
+
+
+class AsyncValidator(Validator):
+    """
+    Base class for validators which wait on I/O. Subclasses implement
+    __call__ as normal, raising Invalid, and should not change any state as
+    they may be run from several threads at once.
+
+    ConcurrentAll and ConcurrentAny run them in their own threads; anywhere
+    else they are called as a normal validator.
+    """
+
+    __slots__ = ()
+
+
+def _run(results, index, validator, v):
+    try:
+        results.put((index, _validate(validator, v), None))
+    except:
+        results.put((index, None, sys.exc_info()))
+
+
+def _start(validators, v):
+    """
+    Start a daemon thread validating the value with each (index, validator),
+    returning the queue their (index, error, exc_info) results are put on.
+    """
+    results = Queue.Queue()
+    for index, validator in validators:
+        thread = threading.Thread(target=_run, args=(results, index, validator, v))
+        thread.setDaemon(True)
+        thread.start()
+    return results
+
+
+def _split(validators):
+    inline = []
+    concurrent = []
+    for index, validator in enumerate(validators):
+        if isinstance(validator, AsyncValidator):
+            concurrent.append((index, validator))
+        else:
+            inline.append((index, validator))
+    return inline, concurrent
+
+
+class ConcurrentAll(All):
+    """
+    An All which runs its AsyncValidator children concurrently.
+
+    The exception lists the failures in the order of the validators, as for
+    All. With fail_fast, it returns as soon as any validator fails, the
+    inline validators first, and the checks still running are left to finish
+    in the background with their results ignored.
+    """
+
+    __slots__ = ()
+
+    def _validate(self, v):
+        inline, concurrent = _split(self.validators)
+        fail_fast = self.fail_fast
+        errors = [None] * len(self.validators)
+        for index, validator in inline:
+            e = _validate(validator, v)
+            if e is not None:
+                if fail_fast:
+                    return self._error([e])
+                errors[index] = e
+        if concurrent:
+            results = _start(concurrent, v)
+            for i in xrange(len(concurrent)):
+                index, e, exc_info = results.get()
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if e is not None:
+                    if fail_fast:
+                        return self._error([e])
+                    errors[index] = e
+        exceptions = [e for e in errors if e is not None]
+        if exceptions:
+            return self._error(exceptions)
+
+    def is_valid(self, v):
+        return self._validate(v) is None
+
+    def _config(self):
+        return All._config(self)
+
+
+class ConcurrentAny(Any):
+    """
+    An Any which runs its AsyncValidator children concurrently.
+
+    It passes as soon as any validator passes, the inline validators first,
+    and the checks still running are left to finish in the background with
+    their results ignored. If every validator fails the exception lists the
+    failures in the order of the validators, as for Any.
+    """
+
+    __slots__ = ()
+
+    def _validate(self, v):
+        inline, concurrent = _split(self.validators)
+        errors = [None] * len(self.validators)
+        for index, validator in inline:
+            e = _validate(validator, v)
+            if e is None:
+                return None
+            errors[index] = e
+        if concurrent:
+            results = _start(concurrent, v)
+            for i in xrange(len(concurrent)):
+                index, e, exc_info = results.get()
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if e is None:
+                    return None
+                errors[index] = e
+        return self._error(errors)
+
+    def is_valid(self, v):
+        return self._validate(v) is None
+
+    def _config(self):
+        return Any._config(self)
@@ -4,12 +4,25 @@ Module containing package exception classes.
 
 
 class Invalid(Exception):
+    """
+    Raised when a value fails validation.
 
-    def __init__(self, message, exceptions=None, validator=None):
-        Exception.__init__(self, message, exceptions)
-        self.message = message
+    When params is given the message is a format string which is only
+    rendered, with the % operator, the first time the message is used, so
+    building an exception that is never displayed costs no formatting.
+
+    key is set for the exceptions of a Mapping, to the field that failed.
+    """
+
+    __slots__ = ('_message', '_params', '_details', 'exceptions', 'validator', 'key')
+
+    def __init__(self, message, exceptions=None, validator=None, params=None, key=None):
+        self._message = message
+        self._params = params
+        self._details = None
         self.exceptions = exceptions
         self.validator = validator
+        self.key = key
 
     def __str__(self):
         return self.message
@@ -21,36 +34,89 @@ class Invalid(Exception):
         else:
             return 'validatish.Invalid("%s", validator=%s)' % (self.message, self.validator)
 
+    def __reduce__(self):
+        return (self.__class__, (self.message, self.exceptions, self.validator, None, self.key))
+
+    @property
+    def args(self):
+        return (self.message, self.exceptions)
+
     @property
     def errors(self):
-        return list(_flatten(self._fetch_errors(), _keepstrings))
+        """ The messages of the leaf exceptions, depth first """
+        return [message for path, message, validator in self.error_details]
 
-    def _fetch_errors(self):
-        if self.exceptions is None:
-            yield self.message
-        else:
-            for e in self.exceptions:
-                yield e._fetch_errors()
+    @property
+    def error_details(self):
+        """
+        A (path, message, validator) tuple for each leaf exception, depth
+        first, where path is the tuple of keys into the exceptions at each
+        level: the exception's key if it has one, otherwise its index. The
+        tree is walked the first time and the result is cached.
+        """
+        if self._details is None:
+            self._details = _leaf_details(self)
+        return list(self._details)
 
-    # Hide Python 2.6 deprecation warning.
-    def _get_message(self): return self._message
-    def _set_message(self, message): self._message = message
+    # Also hides the Python 2.6 deprecation warning for BaseException.message.
+    def _get_message(self):
+        if self._params is not None:
+            self._message = self._message%self._params
+            self._params = None
+        return self._message
+    def _set_message(self, message):
+        self._message = message
+        self._params = None
+        self._details = None
     message = property(_get_message, _set_message)
 
 
-def _flatten(s, toiter=iter):
-    try:
-        it = toiter(s)
-    except TypeError:
-        yield s
-    else:
-        for elem in it:
-            for subelem in _flatten(elem, toiter):
-                yield subelem
+class _JoinedMessages(object):
+    """
+    Format params for a compound validator's message, joining the child
+    exceptions' messages only when the message is rendered.
+    """
 
+    __slots__ = ('exceptions',)
 
-def _keepstrings(seq):
-    if isinstance(seq, basestring):
-        raise TypeError
-    return iter(seq)
+    def __init__(self, exceptions):
+        self.exceptions = exceptions
+
+    def __getitem__(self, key):
+        if key != 'errors':
+            raise KeyError(key)
+        return '; '.join(e.message for e in self.exceptions)
+
+
+class _KeyedMessages(_JoinedMessages):
+    """
+    Format params for a Mapping's message, prefixing each child exception's
+    message with its key.
+    """
 
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key != 'errors':
+            raise KeyError(key)
+        return '; '.join('%s: %s'%(e.key, e.message) for e in self.exceptions)
+
+
+def _leaf_details(error):
+    """
+    Walk the exception tree without recursion, so deep trees cannot hit the
+    recursion limit.
+    """
+    details = []
+    stack = [((), error)]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        path, e = pop()
+        exceptions = e.exceptions
+        if exceptions is None:
+            details.append((path, e.message, e.validator))
+        else:
+            push([(path + (i if child.key is None else child.key,), child)
+                  for i, child in reversed(list(enumerate(exceptions)))])
+    return tuple(details)
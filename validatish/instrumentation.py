@@ -0,0 +1,231 @@
+"""
+Opt-in instrumentation of validator calls.
+
+While enabled, every call of a validator's _validate or is_valid method, or of
+a built-in leaf validator itself, is recorded against the validator instance: the number of calls, passes and
+failures and the time taken, including any child validators. Use it as a
+context manager::
+
+    with instrument() as stats:
+        form_validator(data)
+    print stats.report()
+
+Instrumentation works by wrapping the methods of the Validator classes while it
+is enabled, so there is no overhead at all when it is not. It is global to the
+process, so only one Instrumentation can be enabled at a time. Compiled
+validators are recorded as a whole when is_valid is used.
+"""
+
+import random
+import threading
+import types
+from timeit import default_timer
+
+from validatish.error import Invalid
+from validatish.validator import Validator, _LeafValidator
+
+
+# The Instrumentation currently enabled, if any.
+_enabled = None
+_lock = threading.Lock()
+
+
+def instrument(samples=1000):
+    """
+    Return a new Instrumentation, for use as a context manager.
+
+    :arg samples: the number of timings kept per validator, from which the
+        percentiles are calculated
+    """
+    return Instrumentation(samples)
+
+
+class Stats(object):
+    """ Call counts and timings for one validator """
+
+    def __init__(self, validator, samples):
+        self.validator = validator
+        self.calls = 0
+        self.passed = 0
+        self.failed = 0
+        self.total = 0.0
+        self.samples = []
+        self._size = samples
+
+    def record(self, passed, elapsed):
+        self.calls += 1
+        if passed:
+            self.passed += 1
+        else:
+            self.failed += 1
+        self.total += elapsed
+        # Reservoir sampling keeps an unbiased sample of the timings.
+        if len(self.samples) < self._size:
+            self.samples.append(elapsed)
+        else:
+            i = random.randrange(self.calls)
+            if i < self._size:
+                self.samples[i] = elapsed
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100.0))]
+
+
+def _summary(name, calls, passed, failed, total, samples):
+    ordered = sorted(samples)
+    return {
+        'name': name,
+        'calls': calls,
+        'passed': passed,
+        'failed': failed,
+        'total': total,
+        'mean': calls and total / calls or 0.0,
+        'p50': _percentile(ordered, 50),
+        'p90': _percentile(ordered, 90),
+        'p99': _percentile(ordered, 99),
+    }
+
+
+class Instrumentation(object):
+    """
+    Records calls of every validator while enabled. Timings are in seconds.
+    """
+
+    def __init__(self, samples=1000):
+        self.samples = samples
+        self.stats = {}
+        self._patched = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """ Enable recording """
+        global _enabled
+        _lock.acquire()
+        try:
+            if _enabled is not None:
+                raise ValueError('Instrumentation is already enabled')
+            _enabled = self
+            for cls in _classes(Validator):
+                for name in ('_validate', 'is_valid'):
+                    # Slots of the same name are not methods.
+                    method = cls.__dict__.get(name)
+                    if isinstance(method, types.FunctionType):
+                        self._patched.append((cls, name, method))
+                        setattr(cls, name, self._wrap(method, name == '_validate'))
+            # The leaves check the value directly when called, not through
+            # _validate.
+            method = _LeafValidator.__dict__['__call__']
+            self._patched.append((_LeafValidator, '__call__', method))
+            setattr(_LeafValidator, '__call__', self._wrap_call(method))
+        finally:
+            _lock.release()
+
+    def stop(self):
+        """ Disable recording, keeping the results """
+        global _enabled
+        _lock.acquire()
+        try:
+            for cls, name, method in reversed(self._patched):
+                setattr(cls, name, method)
+            self._patched = []
+            if _enabled is self:
+                _enabled = None
+        finally:
+            _lock.release()
+
+    def _wrap(self, method, returns_error):
+        record = self._record
+        def timed(validator, v):
+            start = default_timer()
+            result = method(validator, v)
+            if returns_error:
+                record(validator, result is None, default_timer() - start)
+            else:
+                record(validator, result, default_timer() - start)
+            return result
+        timed.__name__ = method.__name__
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def _wrap_call(self, method):
+        record = self._record
+        def timed(validator, v):
+            start = default_timer()
+            try:
+                method(validator, v)
+            except Invalid:
+                record(validator, False, default_timer() - start)
+                raise
+            record(validator, True, default_timer() - start)
+        timed.__name__ = method.__name__
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def _record(self, validator, passed, elapsed):
+        self._lock.acquire()
+        try:
+            stats = self.stats.get(id(validator))
+            if stats is None:
+                stats = self.stats[id(validator)] = Stats(validator, self.samples)
+            stats.record(passed, elapsed)
+        finally:
+            self._lock.release()
+
+    def as_dict(self):
+        """
+        Return the results as plain data, with a summary for each validator
+        instance and for each validator class, sorted by total time.
+        """
+        validators = []
+        classes = {}
+        for stats in self.stats.values():
+            validators.append(_summary(repr(stats.validator), stats.calls,
+                    stats.passed, stats.failed, stats.total, stats.samples))
+            totals = classes.setdefault(stats.validator.__class__.__name__, [0, 0, 0, 0.0, []])
+            totals[0] += stats.calls
+            totals[1] += stats.passed
+            totals[2] += stats.failed
+            totals[3] += stats.total
+            totals[4].extend(stats.samples)
+        by_total = lambda summary: -summary['total']
+        return {
+            'validators': sorted(validators, key=by_total),
+            'classes': sorted([_summary(name, *totals) for name, totals in classes.items()],
+                              key=by_total),
+        }
+
+    def report(self):
+        """
+        Return a text report of the results, sorted by total time.
+        """
+        results = self.as_dict()
+        lines = []
+        for title in ('classes', 'validators'):
+            lines.append('%-50s %8s %8s %8s %10s %10s %10s %10s' % (
+                title, 'calls', 'passed', 'failed', 'total ms', 'p50 us', 'p90 us', 'p99 us'))
+            for s in results[title]:
+                lines.append('%-50s %8d %8d %8d %10.3f %10.2f %10.2f %10.2f' % (
+                    s['name'][:50], s['calls'], s['passed'], s['failed'],
+                    s['total'] * 1e3, s['p50'] * 1e6, s['p90'] * 1e6, s['p99'] * 1e6))
+            lines.append('')
+        return '\n'.join(lines)
+
+
+def _classes(cls):
+    """ Return the class and all of its subclasses """
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        for c in _classes(subclass):
+            if c not in classes:
+                classes.append(c)
+    return classes
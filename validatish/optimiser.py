@@ -0,0 +1,198 @@
+"""
+Optimise validator trees assembled from reusable fragments.
+
+optimise rewrites All/Any/Always graphs into an equivalent, cheaper tree:
+
+* nested compounds of the same kind are flattened into their parent
+* Always is dropped from All, and the validators after an Always are dropped
+  from Any, which becomes Always unless a validator before it may raise
+  other exceptions
+* duplicate validators are removed
+* compounds of a single validator are replaced by that validator
+* the children of Any and fail-fast All are ordered by estimated cost, so the
+  cheap type checks run before the regex based validators; validators which
+  may raise other exceptions, e.g. Length of an integer, stay in place
+
+The optimised tree accepts and rejects exactly the same values, and raises
+the same other exceptions, assuming the validators have no side effects. The
+messages may differ, e.g. an Any lists its alternatives' errors in the new
+order.
+"""
+
+from validatish.validator import All, Always, Any, DomainName, Email, Equal, \
+        Integer, Length, Number, OneOf, PlainText, Range, Required, String, \
+        URL, Validator
+
+
+# Rough relative cost of each validator, used to order the children of
+# compounds where that does not change the result.
+_costs = {
+    Always: 0,
+    Required: 1,
+    String: 1,
+    Equal: 1,
+    Length: 1,
+    Range: 1,
+    Integer: 2,
+    Number: 2,
+    OneOf: 2,
+    PlainText: 5,
+    DomainName: 6,
+    Email: 8,
+    URL: 10,
+}
+
+# Validators which only ever pass or raise Invalid, whatever the value, so can
+# be reordered freely. Length and Range raise TypeError for some values, and
+# Equal and OneOf compare with the value, which may raise.
+_safe_types = frozenset([
+    Always, Required, String, PlainText, Integer, Number, DomainName, Email, URL,
+])
+
+# Custom validators and plain functions are assumed to be the most expensive.
+_UNKNOWN_COST = 100
+
+
+def optimise(validator):
+    """
+    Optimise a validator tree, returning (validator, changes) where changes is
+    a list of descriptions of what was changed. The original tree is never
+    modified and is returned as is if there is nothing to optimise.
+    """
+    changes = []
+    return _optimise(validator, changes), changes
+
+
+def _cost(validator):
+    if type(validator) in (All, Any):
+        return sum(_cost(child) for child in validator.validators)
+    return _costs.get(type(validator), _UNKNOWN_COST)
+
+
+def _same(a, b):
+    """
+    Test whether two validators are configured identically. Compound
+    validators are only the same if they are the same object.
+    """
+    if a is b:
+        return True
+    if type(a) in (All, Any) or not isinstance(a, Validator):
+        return False
+    return a == b
+
+
+def _add(children, child, name, changes):
+    for existing in children:
+        if _same(existing, child):
+            changes.append('removed duplicate %r from %s'%(child, name))
+            return
+    children.append(child)
+
+
+def _safe(validator):
+    """
+    Test whether a validator only ever passes or raises Invalid.
+    """
+    if type(validator) in (All, Any):
+        for child in validator.validators:
+            if not _safe(child):
+                return False
+        return True
+    return type(validator) in _safe_types
+
+
+def _order(children, name, changes):
+    # Validators which may raise other exceptions, e.g. Length of an integer,
+    # are kept in place, so the same validators run before them and the
+    # result, including whether they are reached, does not change.
+    ordered = []
+    run = []
+    for child in children:
+        if _safe(child):
+            run.append(child)
+        else:
+            ordered.extend(sorted(run, key=_cost))
+            ordered.append(child)
+            run = []
+    ordered.extend(sorted(run, key=_cost))
+    if ordered != children:
+        changes.append('ordered %s by cost'%(name,))
+    return ordered
+
+
+def _optimise(validator, changes):
+    if type(validator) is All:
+        return _optimise_all(validator, changes)
+    if type(validator) is Any:
+        return _optimise_any(validator, changes)
+    return validator
+
+
+def _optimise_all(validator, changes):
+    fail_fast = validator.fail_fast
+    count = len(changes)
+    children = []
+    for child in validator.validators:
+        child = _optimise(child, changes)
+        if type(child) is Always:
+            changes.append('removed Always from All')
+        elif type(child) is All and child.fail_fast == fail_fast:
+            changes.append('flattened All into All')
+            for grandchild in child.validators:
+                _add(children, grandchild, 'All', changes)
+        else:
+            _add(children, child, 'All', changes)
+    if not children:
+        changes.append('replaced empty All with Always')
+        return Always()
+    if len(children) == 1:
+        changes.append('replaced All of one validator with %r'%(children[0],))
+        return children[0]
+    if fail_fast:
+        children = _order(children, 'All', changes)
+    if len(changes) == count:
+        return validator
+    return All(fail_fast=validator._fail_fast, *children)
+
+
+def _optimise_any(validator, changes):
+    count = len(changes)
+    children = []
+    for child in validator.validators:
+        child = _optimise(child, changes)
+        if type(child) is Any and not child.messages:
+            changes.append('flattened Any into Any')
+            grandchildren = child.validators
+        else:
+            grandchildren = [child]
+        for grandchild in grandchildren:
+            if type(grandchild) is Always:
+                return _end_any(validator, children, grandchild, changes, count)
+            _add(children, grandchild, 'Any', changes)
+    if len(children) == 1 and not validator.messages:
+        changes.append('replaced Any of one validator with %r'%(children[0],))
+        return children[0]
+    children = _order(children, 'Any', changes)
+    if len(changes) == count:
+        return validator
+    return Any(messages=validator.messages, *children)
+
+
+def _end_any(validator, children, always, changes, count):
+    """
+    Return the Any of the children before its first Always, which passes once
+    it is reached. The validators before it still run, and may raise other
+    exceptions, unless they are safe.
+    """
+    while children and _safe(children[-1]):
+        children.pop()
+    if not children:
+        changes.append('folded Any containing Always into Always')
+        return always
+    children.append(always)
+    if len(children) < len(validator.validators):
+        changes.append('removed the validators after Always from Any')
+    children = _order(children, 'Any', changes)
+    if len(changes) == count:
+        return validator
+    return Any(messages=validator.messages, *children)
@@ -0,0 +1,96 @@
+"""
+Parallel batch validation with a pool of processes.
+
+The CPU bound validators, e.g. Email, URL and PlainText, hold the GIL, so
+validate_many uses one core however many threads run it. validate_parallel
+splits the values into chunks which are validated by worker processes.
+"""
+
+from collections import deque
+from itertools import islice
+import multiprocessing
+
+from validatish.validator import _validate
+
+
+# The validator of a worker process, set once when the worker starts.
+_worker_validator = None
+
+
+def _init_worker(validator):
+    global _worker_validator
+    _worker_validator = validator
+
+
+def _validate_chunk(values):
+    """
+    Return the (offset, error) of each failing value in the chunk.
+    """
+    validator = _worker_validator
+    failures = []
+    for offset, value in enumerate(values):
+        error = _validate(validator, value)
+        if error is not None:
+            failures.append((offset, error))
+    return failures
+
+
+def _chunks(values, chunksize):
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_parallel(validator, values, workers=None, chunksize=1000, failures_only=False):
+    """
+    Validate each value from an iterable using a pool of worker processes,
+    lazily yielding (index, error) pairs in input order, as for
+    Validator.validate_many.
+
+    The validator is sent to each worker once, when it starts, so it must be
+    picklable if the platform does not fork. The values and errors are
+    pickled between processes, so the validators of the errors are copies
+    which compare equal to the originals rather than the same objects. At
+    most two chunks per worker are in progress at a time, so memory use does
+    not depend on the number of values.
+
+    :arg workers: the number of processes, defaulting to the number of CPUs
+    :arg chunksize: the number of values sent to a worker at a time
+    :arg failures_only: only yield the values that fail
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers, _init_worker, (validator,))
+    try:
+        pending = deque()
+        index = 0
+        chunks = _chunks(values, chunksize)
+        for chunk in chunks:
+            pending.append((index, len(chunk), pool.apply_async(_validate_chunk, (chunk,))))
+            index += len(chunk)
+            if len(pending) >= workers * 2:
+                for result in _results(pending.popleft(), failures_only):
+                    yield result
+        while pending:
+            for result in _results(pending.popleft(), failures_only):
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _results(chunk, failures_only):
+    start, size, async_result = chunk
+    failures = async_result.get()
+    if failures_only:
+        for offset, error in failures:
+            yield start + offset, error
+        return
+    errors = [None] * size
+    for offset, error in failures:
+        errors[offset] = error
+    for offset, error in enumerate(errors):
+        yield start + offset, error
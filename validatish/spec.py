@@ -0,0 +1,215 @@
+"""
+Declarative specs for validator trees.
+
+A spec is a JSON compatible dict naming the validator class as 'type', with
+the constructor's arguments as the other keys::
+
+    {"type": "All", "validators": [
+        {"type": "Required"},
+        {"type": "Length", "max": 64}]}
+
+to_spec and from_spec convert every built-in validator to and from a spec, so
+from_spec(to_spec(validator)) == validator. Tuples, sets and frozensets, e.g.
+the values of a OneOf, are written as {"$tuple": [...]} etc. so their type is
+kept, and ASCII strings are loaded as str rather than unicode.
+
+load_spec builds, compiles and caches the validator for a spec, so loading the
+same spec again, e.g. in each request handler or forked worker, costs a dict
+lookup.
+"""
+
+import inspect
+import json
+import threading
+
+from validatish import validator as _validator
+from validatish.compiler import CompiledValidator, compile
+from validatish.concurrency import ConcurrentAll, ConcurrentAny
+
+
+# The classes a spec's type can name, unless given others to from_spec.
+_types = dict((cls.__name__, cls) for cls in [
+    _validator.Adaptive, _validator.All, _validator.Always, _validator.Any,
+    _validator.Cached, _validator.DomainName, _validator.Email,
+    _validator.Equal, _validator.Integer, _validator.Length,
+    _validator.Mapping, _validator.Number, _validator.OneOf,
+    _validator.PlainText, _validator.Range, _validator.Required,
+    _validator.String, _validator.URL,
+    ConcurrentAll, ConcurrentAny,
+])
+
+_containers = {
+    '$tuple': tuple,
+    '$set': set,
+    '$frozenset': frozenset,
+}
+
+
+def to_spec(validator):
+    """
+    Return the spec of a validator tree.
+
+    Any validator whose class implements a _config describing how to
+    construct it can be converted; custom validator classes are named by
+    their class name, so must be given to from_spec as types. Raises
+    ValueError for plain functions and validators without a _config.
+    """
+    if isinstance(validator, CompiledValidator):
+        validator = validator.validator
+    config = None
+    if isinstance(validator, _validator.Validator):
+        config = _validator._own_config(validator)
+    if config is None:
+        raise ValueError('%r cannot be converted to a spec'%(validator,))
+    args, kw = config
+    cls = type(validator)
+    spec = {'type': cls.__name__}
+    names, varargs, defaults = _arguments(cls)
+    if varargs:
+        spec['validators'] = [to_spec(child) for child in args]
+    else:
+        kw = dict(zip(names, args), **kw)
+    for key, value in kw.iteritems():
+        # Leave out the arguments that are None by default, including those
+        # taken by **kw.
+        if value is None and (key not in names or key in defaults and defaults[key] is None):
+            continue
+        if key == 'validator':
+            value = to_spec(value)
+        elif key == 'fields':
+            value = dict((name, to_spec(child)) for name, child in value.iteritems())
+        else:
+            value = _encode(value)
+        spec[key] = value
+    return spec
+
+
+def _arguments(cls):
+    """
+    Return the argument names of the class's constructor, whether it takes
+    the validators as *args, and the default of each keyword argument.
+    """
+    if cls.__init__ is object.__init__:
+        return [], False, {}
+    argspec = inspect.getargspec(cls.__init__)
+    names = argspec.args[1:]
+    defaults = dict(zip(reversed(names), reversed(argspec.defaults or ())))
+    return names, bool(argspec.varargs), defaults
+
+
+def _encode(value):
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, _encode(item)) for key, item in value.iteritems())
+    for key, container in _containers.iteritems():
+        if type(value) is container:
+            return {key: [_encode(item) for item in value]}
+    return value
+
+
+def from_spec(spec, types=None):
+    """
+    Build the validator tree described by a spec.
+
+    :arg types: a dict of extra {name: class} that the spec's types can name
+    """
+    if not isinstance(spec, dict) or 'type' not in spec:
+        raise ValueError('%r is not a validator spec'%(spec,))
+    name = spec['type']
+    cls = None
+    if types is not None:
+        cls = types.get(name)
+    if cls is None:
+        cls = _types.get(name)
+    if cls is None:
+        raise ValueError('unknown validator type %r'%(name,))
+    args = ()
+    kw = {}
+    for key, value in spec.iteritems():
+        key = str(key)
+        if key == 'type':
+            continue
+        if key == 'validators':
+            args = [from_spec(child, types) for child in value]
+            continue
+        if key == 'validator':
+            value = from_spec(value, types)
+        elif key == 'fields':
+            value = dict((_decode(field), from_spec(child, types))
+                         for field, child in value.iteritems())
+        else:
+            value = _decode(value)
+        kw[key] = value
+    return cls(*args, **kw)
+
+
+def _decode(value):
+    if isinstance(value, unicode):
+        try:
+            return value.encode('ascii')
+        except UnicodeEncodeError:
+            return value
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1:
+            key, items = value.items()[0]
+            container = _containers.get(key)
+            if container is not None:
+                return container(_decode(item) for item in items)
+        return dict((_decode(key), _decode(item)) for key, item in value.iteritems())
+    return value
+
+
+# The compiled validators already loaded, by spec.
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_spec(spec, types=None):
+    """
+    Return the compiled validator for a spec, given as a dict or its JSON
+    text, building it only the first time the spec is loaded.
+
+    Loading the same text again costs a dict lookup. A dict, or text
+    formatted differently, is first converted to canonical JSON so that it
+    shares the validator of the same spec loaded before.
+
+    The validators are cached for the life of the process and shared by
+    every caller, so they must not be modified. Load them before forking
+    worker processes to share them with the workers.
+
+    :arg types: a dict of extra {name: class} that the spec's types can name
+    """
+    extra = ()
+    if types:
+        extra = tuple(sorted(types.iteritems()))
+    text = None
+    if isinstance(spec, basestring):
+        text = spec, extra
+        validator = _cached(text)
+        if validator is not None:
+            return validator
+        spec = json.loads(spec)
+    key = json.dumps(spec, sort_keys=True), extra
+    validator = _cached(key)
+    if validator is None:
+        # Build outside the lock so loading a large spec does not block others.
+        validator = compile(from_spec(spec, types))
+    _lock.acquire()
+    try:
+        validator = _loaded.setdefault(key, validator)
+        if text is not None:
+            _loaded[text] = validator
+        return validator
+    finally:
+        _lock.release()
+
+
+def _cached(key):
+    _lock.acquire()
+    try:
+        return _loaded.get(key)
+    finally:
+        _lock.release()
@@ -1,6 +1,16 @@
 import unittest
-from validatish import error, validate, validator, util
+from validatish import error, validate, validator, util, vectorised, compiler, \
+        optimiser, instrumentation, concurrency, parallel, cli, spec
 from datetime import datetime
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def error_message(type,self,v,e):
@@ -19,9 +29,13 @@ def check_pass(type, self, fn, values):
             fn(v)
         except Exception, e:
             self.fail(error_message(type,self,v,e))
+        if hasattr(fn, 'is_valid') and not fn.is_valid(v):
+            self.fail(error_message(type,self,v,'is_valid returned False'))
 
 def check_fail(type, self, fn, values):
     for v in values:
+        if hasattr(fn, 'is_valid') and fn.is_valid(v):
+            self.fail(error_message(type,self,v,'is_valid returned True'))
         try:
             fn(v)
             self.fail(error_message(type,self,v,'incorrectly passed validation'))
@@ -185,6 +199,30 @@ class TestPlainText(unittest.TestCase):
         check_fail('function', self, self.fn_extra_hyphen, values)
         check_fail('class', self, self.class_fn_extra_hyphen, values)
 
+    def test_validate_special_extra(self):
+        fn = lambda v: validate.is_plaintext(v, extra=']^\\')
+        class_fn = validator.PlainText(extra=']^\\')
+        self.section='pass'
+        values = [
+            'a]',
+            '^b',
+            'c\\',
+            ]
+        check_pass('function', self, fn, values)
+        check_pass('class', self, class_fn, values)
+        self.section='fail'
+        values = [
+            'a[',
+            'a-b',
+            ]
+        check_fail('function', self, fn, values)
+        check_fail('class', self, class_fn, values)
+
+    def test_regex_cache_bounded(self):
+        for i in range(validate._MAXCACHE * 2):
+            validate.is_plaintext('a', extra=unichr(0x100 + i))
+        assert len(validate._plaintext_cache) <= validate._MAXCACHE
+
 
 class TestEmail(unittest.TestCase):
 
@@ -218,6 +256,27 @@ class TestEmail(unittest.TestCase):
         check_fail('function', self, self.fn, values)
         check_fail('class', self, self.class_fn, values)
 
+    def test_username_characters(self):
+        self.section='username'
+        check_pass('function', self, self.fn, ["!#$%&'*+-/=?^_`{|}.Az09@example.com", 'info\n@example.com', u'info@example.com'])
+        check_fail('function', self, self.fn, ['in fo@example.com', 'info\n\n@example.com', '\n@example.com', u'\xe9@example.com', '"info"@example.com'])
+
+    def test_adversarial(self):
+        # Exponential time for the old username regex.
+        self.assertEquals(self.class_fn.is_valid('a' * 64 + ',@example.com'), False)
+
+    def test_max_length(self):
+        self.section='max_length'
+        v = validator.Email(max_length=16)
+        check_pass('class', self, v, ['info@example.com', None])
+        check_fail('class', self, v, ['info@example.co.uk'])
+        try:
+            validate.is_email('info@example.co.uk', max_length=16)
+        except error.Invalid, e:
+            self.assertEquals(e.message, 'must have 16 or fewer characters')
+        else:
+            self.fail('incorrectly passed validation')
+
 
 class TestDomainName(unittest.TestCase):
 
@@ -249,6 +308,27 @@ class TestDomainName(unittest.TestCase):
         check_fail('function', self, self.fn, values)
         check_fail('class', self, self.class_fn, values)
 
+    def test_characters(self):
+        self.section='characters'
+        check_pass('function', self, self.fn, ['a.b', 'Z0.a-b_c.COM', 'example.com\n', u'example.com'])
+        check_fail('function', self, self.fn, ['.com', '-a.com', 'a.c0m', 'a.', 'a.com.', 'a..',
+                                               'exa mple.com', 'example.com\n\n', u'\xe9.com'])
+
+    def test_adversarial(self):
+        self.assertEquals(self.class_fn.is_valid('a.' * 500000 + '1'), False)
+
+    def test_max_length(self):
+        self.section='max_length'
+        v = validator.DomainName(max_length=11)
+        check_pass('class', self, v, ['example.com', None])
+        check_fail('class', self, v, ['example.co.uk'])
+        try:
+            validate.is_domain_name('example.co.uk', max_length=11)
+        except error.Invalid, e:
+            self.assertEquals(e.message, 'must have 11 or fewer characters')
+        else:
+            self.fail('incorrectly passed validation')
+
 
 class TestURL(unittest.TestCase):
 
@@ -346,6 +426,18 @@ class TestURL(unittest.TestCase):
         check_fail('function', self, fn, values)
 
 
+    def test_class_with_scheme(self):
+        class_fn = validator.URL(with_scheme=True)
+        self.section='pass'
+        check_pass('class', self, class_fn, ['http://foo.com', 'https://foo.com/bar'])
+        self.section='fail'
+        check_fail('class', self, class_fn, ['foo.com', '/foo.com'])
+
+    def test_regex_shared(self):
+        assert validator.URL()._regex is validator.URL(full=1)._regex
+        assert validator.URL(with_scheme=True)._regex is not validator.URL()._regex
+
+
 class TestNumber(unittest.TestCase):
 
     type='Number'
@@ -553,6 +645,39 @@ class TestOneOf(unittest.TestCase):
 
 
 
+    def test_validate_unhashable(self):
+        fn = lambda v: validate.is_one_of(v, [[1,2], {'a': 1}, 'x'])
+        class_fn = validator.OneOf([[1,2], {'a': 1}, 'x'])
+        self.section='pass'
+        values = [
+            [1,2],
+            (1,2),
+            {'a': 1},
+            'x',
+            ]
+        check_pass('function', self, fn, values)
+        check_pass('class', self, class_fn, values)
+        self.section='fail'
+        values = [
+            [1],
+            {'a': 2},
+            {},
+            'y',
+            ]
+        check_fail('function', self, fn, values)
+        check_fail('class', self, class_fn, values)
+
+    def test_unhashable_value(self):
+        self.section='fail'
+        check_fail('class', self, self.class_fn, [{}, set([3])])
+
+    def test_messages(self):
+        try:
+            validator.OneOf([1,2])(3)
+        except error.Invalid, e:
+            self.assertEquals(e.message, 'must be one of [1, 2]')
+
+
 class TestLength(unittest.TestCase):
 
     type = 'Length'
@@ -761,6 +886,51 @@ class TestAll_StringRequired(unittest.TestCase):
             self.assertEquals('must be a string',e.errors[0])
 
 
+class TestAll_FailFast(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        def expensive(v):
+            self.calls.append(v)
+        self.fn = validator.All(validator.Required(), validator.String(), expensive, fail_fast=True)
+
+    def test_stops_at_first_failure(self):
+        try:
+            self.fn('')
+        except error.Invalid, e:
+            self.assertEquals(e.message, 'is required')
+            self.assertEquals(e.errors, ['is required'])
+            self.assertEquals(e.validator, self.fn)
+            self.assertEquals(e.exceptions[0].validator, self.fn.validators[0])
+        else:
+            self.fail('incorrectly passed validation')
+        self.assertEquals(self.calls, [])
+
+    def test_pass(self):
+        self.fn('a')
+        self.assertEquals(self.calls, ['a'])
+
+    def test_global_default(self):
+        fn = validator.All(validator.Required(), validator.String())
+        self.assertEquals(len(fn._validate([]).exceptions), 2)
+        validator.All.default_fail_fast = True
+        try:
+            self.assertEquals(len(fn._validate([]).exceptions), 1)
+            explicit = validator.All(validator.Required(), validator.String(), fail_fast=False)
+            self.assertEquals(len(explicit._validate([]).exceptions), 2)
+        finally:
+            validator.All.default_fail_fast = False
+
+    def test_compiled(self):
+        compiled = compiler.compile(self.fn)
+        self.assertEquals(error_tree(compiled._validate(0)), error_tree(self.fn._validate(0)))
+        self.assertEquals(self.calls, [])
+
+    def test_unknown_keyword(self):
+        self.assertRaises(TypeError, validator.All, validator.Required(), messages={})
+        self.assertRaises(TypeError, validator.All, validator.Required(), failfast=True)
+
+
 class TestAny_IntegerString(unittest.TestCase):
 
     type='Any'
@@ -792,6 +962,32 @@ class TestAny_IntegerString(unittest.TestCase):
             assert 'string' in ''.join(e.errors)
             assert 'integer' in ''.join(e.errors)
 
+    def test_custom_messages(self):
+        fn = validator.Any(validator.String(), validator.Integer(),
+                           messages={'please-fix': 'either %(errors)s'})
+        for v in [fn, compiler.compile(fn)]:
+            e = v._validate(0.5)
+            self.assertEquals(e.message, 'either must be a string; must be a integer')
+            self.assertEquals(e.errors, ['must be a string', 'must be a integer'])
+
+    def test_lazy_exceptions(self):
+        built = []
+        class Tracked(validator.Integer):
+            __slots__ = ()
+            def _validate(self, v):
+                built.append(v)
+                return validator.Integer._validate(self, v)
+        fn = validator.Any(Tracked(), validator.String())
+        fn('x')
+        self.assertEquals(built, ['x'])
+        self.assertEquals(fn._validate(0.5).errors, ['must be a integer', 'must be a string'])
+        self.assertEquals(built, ['x', 0.5])
+        # Each child is checked once however the Any is called.
+        for fn in [compiler.compile(fn), validator.Adaptive(fn)]:
+            del built[:]
+            self.assertEquals(fn._validate(0.5).errors, ['must be a integer', 'must be a string'])
+            self.assertEquals(built, [0.5])
+
 
 class TestAny_RangeInteger(unittest.TestCase):
 
@@ -877,6 +1073,1178 @@ class TestAlways(unittest.TestCase):
             self.fail("Always should have non-zero")
 
 
+class NoGmail(validator.Email):
+    """ A subclass adding a check of its own in __call__ """
+
+    def __call__(self, v):
+        validator.Email.__call__(self, v)
+        if v and v.endswith('@gmail.com'):
+            raise error.Invalid('must not be a gmail address')
+
+
+class DomainEmail(validator.Email):
+    """ A subclass with state of its own, but no _config """
+
+    def __init__(self, domain, messages=None):
+        validator.Email.__init__(self, messages=messages)
+        object.__setattr__(self, 'domain', domain)
+
+    def __call__(self, v):
+        validator.Email.__call__(self, v)
+        if v and not v.endswith('@' + self.domain):
+            raise error.Invalid('must be an address at %s'%self.domain)
+
+
+class TestIsValid(unittest.TestCase):
+
+    def test_custom_validator(self):
+        class Odd(validator.Validator):
+            def __call__(self, v):
+                if not v % 2:
+                    raise error.Invalid('must be odd')
+        assert Odd().is_valid(1)
+        assert not Odd().is_valid(2)
+
+    def test_functions_in_compound(self):
+        def odd(v):
+            if not v % 2:
+                raise error.Invalid('must be odd')
+        assert validator.All(odd, validator.Integer()).is_valid(3)
+        assert not validator.All(odd, validator.Integer()).is_valid(4)
+        assert validator.Any(odd, validator.Range(max=2)).is_valid(2)
+        assert not validator.Any(odd, validator.Range(max=2)).is_valid(4)
+
+    def test_subclass_call(self):
+        no_gmail = NoGmail()
+        assert not no_gmail.is_valid('x@gmail.com')
+        assert not no_gmail.is_valid('x')
+        assert no_gmail.is_valid('x@example.com')
+        assert not validator.All(validator.Required(), no_gmail).is_valid('x@gmail.com')
+        assert not validator.Any(no_gmail, validator.Integer()).is_valid('x@gmail.com')
+        assert not validator.Mapping({'email': no_gmail}).is_valid({'email': 'x@gmail.com'})
+
+    def test_subclass_call_errors(self):
+        no_gmail = NoGmail()
+        self.assertRaises(error.Invalid, no_gmail, 'x@gmail.com')
+        no_gmail('x@example.com')
+        for fn in [validator.All(validator.Required(), no_gmail),
+                   validator.Any(no_gmail, validator.Integer())]:
+            self.assertRaises(error.Invalid, fn, 'x@gmail.com')
+            fn('x@example.com')
+        e = no_gmail._validate('x@gmail.com')
+        self.assertEquals((e.message, e.validator), ('must not be a gmail address', no_gmail))
+        self.assertEquals(no_gmail._validate('x').message, 'must contain one @')
+        assert no_gmail._validate('x@example.com') is None
+
+    def test_subclass_call_compiled(self):
+        for fn in [validator.All(validator.Required(), NoGmail()),
+                   validator.Any(NoGmail(), validator.Integer()), NoGmail()]:
+            compiled = compiler.compile(fn)
+            self.assertRaises(error.Invalid, compiled, 'x@gmail.com')
+            assert not compiled.is_valid('x@gmail.com')
+            compiled('x@example.com')
+            assert compiled.is_valid('x@example.com')
+
+
+class TestValidateMany(unittest.TestCase):
+
+    def test_results(self):
+        results = list(validator.Integer().validate_many([1, 'a', None, 2.5]))
+        self.assertEquals([i for i, e in results], [0, 1, 2, 3])
+        self.assertEquals([e is None for i, e in results], [True, False, True, False])
+        self.assertEquals(results[1][1].message, 'must be a integer')
+
+    def test_failures_only(self):
+        fn = validator.All(validator.Required(), validator.Length(max=2))
+        results = list(fn.validate_many(['a', '', 'abc', 'ab'], failures_only=True))
+        self.assertEquals([i for i, e in results], [1, 2])
+        self.assertEquals(results[0][1].validator, fn)
+
+    def test_lazy(self):
+        def values():
+            yield 'a'
+            raise AssertionError('consumed too far')
+        results = validator.Any(validator.Integer(), validator.String()).validate_many(values())
+        self.assertEquals(results.next(), (0, None))
+
+    def test_custom_validator(self):
+        class Odd(validator.Validator):
+            def __call__(self, v):
+                if not v % 2:
+                    raise error.Invalid('must be odd')
+        results = list(Odd().validate_many([1, 2], failures_only=True))
+        self.assertEquals(results[0][0], 1)
+        self.assertEquals(results[0][1].message, 'must be odd')
+
+
+class TestValidateArray(unittest.TestCase):
+
+    def check(self, v, values):
+        for array in (numpy.array(values), numpy.array(values, dtype=object)):
+            mask, failures = v.validate_array(array)
+            expected = [v.is_valid(x) for x in array]
+            self.assertEquals(list(mask), expected)
+            self.assertEquals(list(failures), [i for i, ok in enumerate(expected) if not ok])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_range(self):
+        self.check(validator.Range(min=1, max=3), [0, 1, 2.5, 3, 3.5, -7])
+        self.check(validator.Range(max=3), [0, 1, 2.5, 3, 3.5, -7])
+        self.check(validator.Range(), [0, 1, 2.5])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_number(self):
+        self.check(validator.Number(), [1, 2, 3])
+        self.check(validator.Number(), [1.5, float('nan'), 3])
+        self.check(validator.Number(), ['1', 'a'])
+        self.check(validator.Number(), [1, 'a', None])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_integer(self):
+        self.check(validator.Integer(), [1, 2, -3])
+        self.check(validator.Integer(), [1.0, 1.5, -2.0, float('nan')])
+        self.check(validator.Integer(), ['1', 'a'])
+        self.check(validator.Integer(), [1, 'a', None, 2.5])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_length(self):
+        self.check(validator.Length(min=2, max=3), ['a', 'ab', 'abc', 'abcd', u'ab'])
+        self.check(validator.Length(max=1), ['a', 'ab'])
+        self.check(validator.Length(min=2), [[1], [1, 2], (1, 2, 3)])
+
+    @unittest.skipIf(numpy is not None, 'NumPy is installed')
+    def test_no_numpy(self):
+        self.assertRaises(ImportError, validator.Range(max=1).validate_array, [1, 2])
+
+    def test_numpy_imported_lazily(self):
+        code = 'import sys, validatish; assert "numpy" not in sys.modules'
+        self.assertEquals(subprocess.call([sys.executable, '-c', code]), 0)
+
+
+def odd(v):
+    if not isinstance(v, int) or not v % 2:
+        raise error.Invalid('must be odd')
+
+
+def error_tree(e):
+    if e is None:
+        return None
+    return (e.message, e.validator, [error_tree(x) for x in e.exceptions or []])
+
+
+class TestCompile(unittest.TestCase):
+
+    values = [None, '', 'a', 'abc', 'abcdefgh', 'info@example.com', 0, 1, 3, 7, 12.5, [], ['a']]
+
+    trees = [
+        validator.Required(),
+        validator.Length(min=2, max=5),
+        validator.All(validator.Required(), validator.String(), validator.Length(max=5)),
+        validator.Any(validator.Integer(), validator.Email()),
+        validator.All(validator.Required(),
+                      validator.Any(validator.All(validator.Integer(), validator.Range(min=5)),
+                                    validator.Email(),
+                                    validator.OneOf(['a', 'b']))),
+        validator.All(validator.Always(), validator.Number()),
+        validator.Any(validator.Email(), validator.Always()),
+        validator.Any(validator.Length(min=1), validator.Always(), validator.Email()),
+        validator.Any(validator.Always(), validator.Length(min=1)),
+        validator.All(odd, validator.Range(max=5)),
+        validator.Any(odd, validator.PlainText()),
+        validator.Any(),
+        validator.All(),
+        ]
+
+    def outcome(self, fn, v):
+        try:
+            result = fn(v)
+        except error.Invalid, e:
+            return error_tree(e)
+        except TypeError:
+            return TypeError
+        return result
+
+    def test_same_results(self):
+        for tree in self.trees:
+            compiled = compiler.compile(tree)
+            for v in self.values:
+                self.assertEquals(self.outcome(compiled, v), self.outcome(tree, v))
+                self.assertEquals(self.outcome(compiled.is_valid, v), self.outcome(tree.is_valid, v))
+
+    def test_recompile(self):
+        tree = self.trees[2]
+        compiled = compiler.compile(compiler.compile(tree))
+        self.assertEquals(compiled.validator, tree)
+        compiled = compiler.compile(validator.All(compiler.compile(tree)))
+        self.assertEquals(self.outcome(compiled, 'abcdefgh')[2][0], self.outcome(tree, 'abcdefgh'))
+
+    def test_validate_many(self):
+        compiled = compiler.compile(self.trees[2])
+        values = ['abc', '', None, 'abcdefgh', 'a']
+        self.assertEquals([i for i, e in compiled.validate_many(values, failures_only=True)],
+                          [1, 2, 3])
+
+
+class TestOptimise(unittest.TestCase):
+
+    values = [None, '', 'a', 'abc', 'abcdefgh', 'info@example.com', 'a b', 0, 1, 3, 7, 12.5, [], ['a']]
+
+    def outcome(self, fn, v):
+        try:
+            return fn(v)
+        except TypeError:
+            return TypeError
+
+    def check(self, tree):
+        optimised, changes = optimiser.optimise(tree)
+        for v in self.values:
+            self.assertEquals(self.outcome(optimised.is_valid, v), self.outcome(tree.is_valid, v))
+            self.assertEquals(self.outcome(optimised._validate, v) is None,
+                              self.outcome(tree._validate, v) is None)
+            self.assertEquals(self.outcome(optimised._validate, v) is TypeError,
+                              self.outcome(tree._validate, v) is TypeError)
+        return optimised, changes
+
+    def test_fragments(self):
+        tree = validator.All(validator.All(validator.Required(), validator.String()),
+                             validator.Any(validator.Always(), validator.Email()),
+                             validator.String(),
+                             validator.Length(max=255))
+        optimised, changes = self.check(tree)
+        self.assertEquals(type(optimised), validator.All)
+        self.assertEquals([type(v) for v in optimised.validators],
+                          [validator.Required, validator.String, validator.Length])
+        self.assertEquals(changes, [
+            'flattened All into All',
+            'folded Any containing Always into Always',
+            'removed Always from All',
+            'removed duplicate validatish.String() from All',
+            ])
+
+    def test_order(self):
+        tree = validator.Any(validator.Email(), validator.Integer(), validator.PlainText())
+        optimised, changes = self.check(tree)
+        self.assertEquals([type(v) for v in optimised.validators],
+                          [validator.Integer, validator.PlainText, validator.Email])
+        self.assertEquals(changes, ['ordered Any by cost'])
+        tree = validator.All(validator.Email(), validator.Integer(), fail_fast=True)
+        optimised, changes = self.check(tree)
+        self.assertEquals(optimised.fail_fast, True)
+        self.assertEquals(type(optimised.validators[0]), validator.Integer)
+        # Reordering a full All changes nothing as every validator is run.
+        tree = validator.All(validator.Email(), validator.Length(max=5))
+        self.assertEquals(optimiser.optimise(tree), (tree, []))
+
+    def test_order_keeps_guards(self):
+        tree = validator.Any(validator.Integer(), validator.Length(max=3))
+        self.assertEquals(optimiser.optimise(tree), (tree, []))
+        self.check(tree)
+        tree = validator.All(validator.PlainText(), validator.Length(max=10), fail_fast=True)
+        self.assertEquals(optimiser.optimise(tree), (tree, []))
+        self.check(tree)
+        # Only the validators between those that may raise are reordered.
+        tree = validator.Any(validator.Email(), validator.Integer(), validator.Range(max=3),
+                             validator.URL(), validator.String(), odd)
+        optimised, changes = self.check(tree)
+        self.assertEquals([type(v) for v in optimised.validators[:5]],
+                          [validator.Integer, validator.Email, validator.Range,
+                           validator.String, validator.URL])
+        self.assertEquals(optimised.validators[5], odd)
+
+    def test_any_always_guards(self):
+        # The validators before an Always still run, and Length raises
+        # TypeError for an integer.
+        tree = validator.Any(validator.Length(min=1), validator.Always())
+        self.assertEquals(optimiser.optimise(tree), (tree, []))
+        self.check(tree)
+        self.assertRaises(TypeError, optimiser.optimise(tree)[0], 5)
+        tree = validator.Any(validator.Length(min=1), validator.Email(), validator.Always(), odd)
+        optimised, changes = self.check(tree)
+        self.assertEquals([type(v) for v in optimised.validators],
+                          [validator.Length, validator.Always])
+        self.assertEquals(changes, ['removed the validators after Always from Any'])
+        tree = validator.Any(validator.String(), validator.Always(), validator.Length(min=1))
+        optimised, changes = self.check(tree)
+        self.assertEquals(type(optimised), validator.Always)
+        self.assertEquals(changes, ['folded Any containing Always into Always'])
+
+    def test_nested_any(self):
+        tree = validator.Any(validator.Any(validator.Integer(), validator.Email()),
+                             validator.Any(validator.Email()), validator.String())
+        optimised, changes = self.check(tree)
+        self.assertEquals([type(v) for v in optimised.validators],
+                          [validator.String, validator.Integer, validator.Email])
+
+    def test_degenerate(self):
+        optimised, changes = self.check(validator.All(validator.Always()))
+        self.assertEquals(type(optimised), validator.Always)
+        optimised, changes = self.check(validator.All(validator.Required(), validator.Required()))
+        self.assertEquals(type(optimised), validator.Required)
+        optimised, changes = self.check(validator.Any())
+        self.assertEquals(type(optimised), validator.Any)
+
+    def test_distinct_config(self):
+        tree = validator.All(validator.Length(max=5), validator.Length(min=2), odd, odd, validator.Length(max=5))
+        optimised, changes = self.check(tree)
+        self.assertEquals(len(optimised.validators), 3)
+
+    def test_unchanged(self):
+        tree = validator.All(validator.Required(), validator.Email())
+        self.assertEquals(optimiser.optimise(tree), (tree, []))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_counts(self):
+        required = validator.Required()
+        email = validator.Email()
+        fn = validator.All(required, email)
+        with instrumentation.instrument() as stats:
+            fn('info@example.com')
+            self.assertRaises(error.Invalid, fn, '')
+            fn.is_valid('x')
+        results = stats.as_dict()
+        by_name = dict((s['name'], s) for s in results['validators'])
+        self.assertEquals(by_name[repr(fn)]['calls'], 3)
+        self.assertEquals(by_name[repr(fn)]['failed'], 2)
+        self.assertEquals(by_name[repr(required)]['calls'], 3)
+        self.assertEquals(by_name[repr(required)]['passed'], 2)
+        self.assertEquals(by_name[repr(email)]['calls'], 3)
+        self.assertEquals(by_name[repr(email)]['failed'], 2)
+        classes = dict((s['name'], s) for s in results['classes'])
+        self.assertEquals(classes['Email']['calls'], 3)
+        self.assertEquals(results['validators'][0]['name'], repr(fn))
+        assert 'Email' in stats.report()
+
+    def test_leaf_called(self):
+        email = validator.Email()
+        with instrumentation.instrument() as stats:
+            email('info@example.com')
+            self.assertRaises(error.Invalid, email, 'x')
+        results = stats.as_dict()['validators']
+        self.assertEquals(len(results), 1)
+        self.assertEquals((results[0]['calls'], results[0]['passed'], results[0]['failed']),
+                          (2, 1, 1))
+
+    def test_any_checked_once(self):
+        required = validator.Required()
+        email = validator.Email()
+        with instrumentation.instrument() as stats:
+            e = validator.Any(required, email)._validate('')
+        self.assertEquals(e.errors, ['is required', 'must contain one @'])
+        calls = dict((s['name'], s['calls']) for s in stats.as_dict()['validators'])
+        self.assertEquals(calls[repr(required)], 1)
+        self.assertEquals(calls[repr(email)], 1)
+
+    def test_custom_and_functions(self):
+        class Odd(validator.Validator):
+            def __call__(self, v):
+                odd(v)
+        custom = Odd()
+        with instrumentation.instrument() as stats:
+            validator.Any(custom, odd).is_valid(2)
+            validator.All(custom)._validate(2)
+        calls = [s['calls'] for s in stats.as_dict()['validators'] if s['name'] == repr(custom)]
+        self.assertEquals(calls, [2])
+
+    def test_disabled(self):
+        leaf = validator._LeafValidator.__dict__
+        original = validator.Required.__dict__.get('_validate'), leaf['_validate'], leaf['__call__']
+        stats = instrumentation.instrument()
+        with stats:
+            self.assertRaises(ValueError, instrumentation.instrument().start)
+        self.assertEquals((validator.Required.__dict__.get('_validate'), leaf['_validate'], leaf['__call__']), original)
+        validator.Required()('x')
+        self.assertEquals(stats.stats, {})
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_cases_run(self):
+        from validatish.benchmarks import suite
+        for name, fn in suite.cases():
+            fn()
+
+    def test_compare(self):
+        from validatish.benchmarks import suite
+        baseline = {'results': {'a': 1.0, 'b': 2.0, 'c': 3.0}}
+        current = {'results': {'a': 1.1, 'b': 3.0, 'd': 9.0}}
+        self.assertEquals(suite.compare(baseline, current), [('b', 2.0, 3.0, 1.5)])
+        self.assertEquals(suite.compare(baseline, current, threshold=0.05),
+                          [('a', 1.0, 1.1, 1.1), ('b', 2.0, 3.0, 1.5)])
+
+
+class TestErrorStructure(unittest.TestCase):
+
+    def test_nested(self):
+        range_ = validator.Range(min=5)
+        email = validator.Email()
+        inner = validator.All(validator.Integer(), range_)
+        any_ = validator.Any(inner, email)
+        fn = validator.All(validator.Required(), any_)
+        try:
+            fn(3)
+        except error.Invalid, e:
+            self.assertEquals(e.validator, fn)
+            self.assertEquals(len(e.exceptions), 1)
+            self.assertEquals(e.exceptions[0].validator, any_)
+            self.assertEquals([x.validator for x in e.exceptions[0].exceptions], [inner, email])
+            self.assertEquals(e.exceptions[0].exceptions[0].exceptions[0].validator, range_)
+            self.assertEquals(e.errors, ['must be greater than or equal to 5', 'must be a string'])
+            self.assertEquals(e.message, 'Please fix any of: must be greater than or equal to 5; must be a string')
+        else:
+            self.fail('incorrectly passed validation')
+
+    def test_function_child(self):
+        def odd(v):
+            if not v % 2:
+                raise error.Invalid('must be odd')
+        try:
+            validator.All(odd)(2)
+        except error.Invalid, e:
+            self.assertEquals(e.exceptions[0].validator, odd)
+            self.assertEquals(e.errors, ['must be odd'])
+
+    def test_custom_messages(self):
+        try:
+            validator.String(messages={'type-string': 'text please'})(1)
+        except error.Invalid, e:
+            self.assertEquals(e.message, 'text please')
+
+
+class TestLazyInvalid(unittest.TestCase):
+
+    def test_rendered_on_access(self):
+        length = validator.Length(min=2, max=5)
+        e = length._validate('abcdefgh')
+        self.assertEquals(e._params, {'min': 2, 'max': 5, 'unit': 'characters'})
+        self.assertEquals(e.message, 'must have between 2 and 5 characters')
+        self.assertEquals(e._params, None)
+        self.assertEquals(str(e), 'must have between 2 and 5 characters')
+        self.assertEquals(e.args, ('must have between 2 and 5 characters', None))
+        self.assertEquals(repr(e), 'validatish.Invalid("must have between 2 and 5 characters", validator=%r)' % length)
+        self.assertEquals(e.errors, ['must have between 2 and 5 characters'])
+        self.failIf(hasattr(e, '__dict__') and e.__dict__)
+
+    def test_compound(self):
+        e = validator.All(validator.Integer(), validator.Length(max=5))._validate('abcdefgh')
+        self.assertEquals(e.message, 'must be a integer; must have 5 or fewer characters')
+        self.assertEquals(str(e), e.message)
+        self.assertEquals(e.errors, ['must be a integer', 'must have 5 or fewer characters'])
+
+    def test_percent_in_plain_message(self):
+        e = error.Invalid('100% wrong')
+        self.assertEquals(e.message, '100% wrong')
+        e = validator.Required(messages={'required': '100% required'})._validate('')
+        self.assertEquals(e.message, '100% required')
+
+    def test_set_message(self):
+        e = validator.Range(max=1)._validate(2)
+        e.message = 'too big'
+        self.assertEquals(str(e), 'too big')
+
+    def test_pickle(self):
+        import pickle
+        e = validator.All(validator.Integer(), validator.Length(max=5))._validate('abcdefgh')
+        e = pickle.loads(pickle.dumps(e))
+        self.assertEquals(e.message, 'must be a integer; must have 5 or fewer characters')
+        self.assertEquals(e.errors, ['must be a integer', 'must have 5 or fewer characters'])
+
+
+class TestErrorDetails(unittest.TestCase):
+
+    def test_paths(self):
+        range_ = validator.Range(min=5)
+        email = validator.Email()
+        required = validator.Required()
+        fn = validator.All(required, validator.Any(validator.All(validator.Integer(), range_), email))
+        e = fn._validate(3)
+        self.assertEquals(e.error_details, [
+            ((0, 0, 0), 'must be greater than or equal to 5', range_),
+            ((0, 1), 'must be a string', email)])
+        self.assertEquals(e.errors, ['must be greater than or equal to 5', 'must be a string'])
+        e = required._validate('')
+        self.assertEquals(e.error_details, [((), 'is required', required)])
+
+    def test_empty_exceptions(self):
+        self.assertEquals(error.Invalid('nothing', []).errors, [])
+
+    def test_cached(self):
+        e = validator.All(validator.Integer(), validator.Length(max=5))._validate('abcdefgh')
+        errors = e.errors
+        errors.append('changed')
+        self.assertEquals(e.errors, ['must be a integer', 'must have 5 or fewer characters'])
+        self.assert_(e._details is not None)
+
+    def test_set_message_clears_cache(self):
+        e = validator.Required()._validate('')
+        self.assertEquals(e.errors, ['is required'])
+        e.message = 'needed'
+        self.assertEquals(e.errors, ['needed'])
+
+    def test_deep(self):
+        e = error.Invalid('leaf')
+        for i in xrange(5000):
+            e = error.Invalid('node', [e])
+        details = e.error_details
+        self.assertEquals(len(details), 1)
+        self.assertEquals(details[0][0], (0,) * 5000)
+        self.assertEquals(e.errors, ['leaf'])
+
+
+class TestImmutable(unittest.TestCase):
+
+    def test_no_dict(self):
+        for v in [validator.Required(), validator.PlainText(), validator.URL(),
+                  validator.OneOf([1]), validator.Length(max=1),
+                  validator.All(validator.Required()), validator.Any(validator.Email()),
+                  validator.Always(), compiler.compile(validator.Integer())]:
+            self.failIf(hasattr(v, '__dict__'), v)
+
+    def test_immutable(self):
+        v = validator.Length(max=5)
+        self.assertRaises(AttributeError, setattr, v, 'max', 10)
+        self.assertRaises(AttributeError, setattr, v, 'other', 10)
+        self.assertRaises(AttributeError, delattr, v, 'max')
+        self.assertRaises(AttributeError, setattr, validator.All(), 'validators', ())
+        self.assertEquals(v.max, 5)
+
+    def test_equality(self):
+        self.assertEquals(validator.Length(max=5), validator.Length(max=5))
+        self.assertNotEquals(validator.Length(max=5), validator.Length(max=6))
+        self.assertNotEquals(validator.Length(max=5), validator.Range(max=5))
+        self.assertNotEquals(validator.Required(), validator.Required(messages={'required': 'x'}))
+        self.assertEquals(validator.OneOf([1, [2]]), validator.OneOf([1, [2]]))
+        self.assertNotEquals(validator.OneOf([1, 2]), validator.OneOf((1, 2)))
+        self.assertEquals(validator.URL(with_scheme=True), validator.URL(absolute=False, relative=False))
+        self.assertEquals(validator.All(validator.Required(), validator.Email()),
+                          validator.All(validator.Required(), validator.Email()))
+        self.assertNotEquals(validator.All(validator.Required()),
+                             validator.All(validator.Required(), fail_fast=True))
+        self.assertEquals(validator.Always(), validator.Always())
+
+    def test_custom_by_identity(self):
+        class Custom(validator.Validator):
+            pass
+        self.assertNotEquals(Custom(), Custom())
+        c = Custom()
+        self.assertEquals(c, c)
+        c.attribute = 1
+
+    def test_inherited_config(self):
+        import pickle
+        a, b = DomainEmail('a.com'), DomainEmail('b.com')
+        self.assertNotEquals(a, b)
+        self.assertNotEquals(DomainEmail('a.com'), a)
+        self.assertEquals(a, a)
+        optimised, changes = optimiser.optimise(validator.All(a, b))
+        self.assertEquals(optimised.validators, (a, b))
+        for protocol in (0, 2):
+            copy = pickle.loads(pickle.dumps(a, protocol))
+            self.assertEquals((type(copy), copy.domain), (DomainEmail, 'a.com'))
+            self.assertRaises(error.Invalid, copy, 'x@b.com')
+        self.assertRaises(ValueError, spec.to_spec, a)
+
+    def test_intern(self):
+        interned = {}
+        a = interned.setdefault(validator.Range(min=1, max=5), validator.Range(min=1, max=5))
+        b = interned.setdefault(validator.Range(min=1, max=5), validator.Range(min=1, max=5))
+        self.assert_(a is b)
+        self.assertEquals(len(set([validator.OneOf([{'a': 1}]), validator.OneOf([{'a': 1}])])), 1)
+
+    def test_pickle(self):
+        import pickle
+        for v in [validator.PlainText(extra='-'), validator.URL(with_scheme=True),
+                  validator.Equal([1]), validator.OneOf([1, [2]]),
+                  validator.All(validator.Required(), validator.Length(max=3), fail_fast=True),
+                  validator.Any(validator.Integer(), validator.Email()),
+                  validator.Always(), compiler.compile(validator.All(validator.Integer())),
+                  validator.Required(), validator.Number(messages={'type-number': 'x'}),
+                  concurrency.ConcurrentAny(validator.String())]:
+            for protocol in (0, 2):
+                copy = pickle.loads(pickle.dumps(v, protocol))
+                self.assertEquals(copy, v)
+                self.assertEquals(hash(copy), hash(v))
+
+
+class TestCached(unittest.TestCase):
+
+    def test_same_results(self):
+        email = validator.Email()
+        cached = validator.Cached(email)
+        for value in ['info@example.com', 'info@example', 1, None, 'info@example']:
+            self.assertEquals(cached.is_valid(value), email.is_valid(value))
+            self.assertEquals(error_tree(cached._validate(value)), error_tree(email._validate(value)))
+        self.assertRaises(error.Invalid, cached, 'info@example')
+        cached('info@example.com')
+
+    def test_stats(self):
+        cached = validator.Cached(validator.DomainName())
+        for value in ['example.com', 'example', 'example.com', 'example.com']:
+            cached.is_valid(value)
+        self.assertEquals(cached.cache_info(), (2, 2, 1000, 2))
+        cached.cache_clear()
+        self.assertEquals(cached.cache_info(), (0, 0, 1000, 0))
+
+    def test_lru(self):
+        calls = []
+        def odd(v):
+            calls.append(v)
+            if not v % 2:
+                raise error.Invalid('must be odd')
+        cached = validator.Cached(odd, maxsize=2)
+        for value in [1, 2, 1, 3, 1, 2]:
+            cached.is_valid(value)
+        # 2 was evicted by 3, as 1 had been used more recently.
+        self.assertEquals(calls, [1, 2, 3, 2])
+        self.assertEquals(cached.cache_info().size, 2)
+        self.assertEquals(cached._validate(2).message, 'must be odd')
+
+    def test_keyed_by_type(self):
+        cached = validator.Cached(validator.String())
+        self.assertEquals(cached.is_valid(1), False)
+        self.assertEquals(cached.is_valid(1.0), False)
+        self.assertEquals(cached.is_valid(u'a'), True)
+        self.assertEquals(cached.cache_info().misses, 3)
+
+    def test_unhashable(self):
+        cached = validator.Cached(validator.Length(max=2))
+        self.assertEquals(cached.is_valid([1, 2, 3]), False)
+        self.assertEquals(cached.is_valid([1]), True)
+        self.assertEquals(cached.cache_info(), (0, 0, 1000, 0))
+
+    def test_separate_caches(self):
+        short = validator.Cached(validator.Length(max=2))
+        long = validator.Cached(validator.Length(max=5))
+        self.assertEquals(short.is_valid('abc'), False)
+        self.assertEquals(long.is_valid('abc'), True)
+
+    def test_in_tree(self):
+        tree = validator.All(validator.Required(), validator.Cached(validator.Email()))
+        self.assertEquals(tree._validate('info@example').errors,
+                          ['domain name part after the @ is incorrect'])
+        self.assertEquals(compiler.compile(tree).is_valid('info@example.com'), True)
+
+    def test_threads(self):
+        import threading
+        cached = validator.Cached(validator.Integer(), maxsize=10)
+        def work():
+            for i in range(1000):
+                cached.is_valid(i % 20)
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        info = cached.cache_info()
+        self.assertEquals(info.hits + info.misses, 4000)
+        self.assertEquals(info.size, 10)
+        self.assertEquals(len(cached._cache), 10)
+
+
+class Lookup(concurrency.AsyncValidator):
+    """ A stand-in for a remote lookup, waiting on events instead of I/O """
+
+    def __init__(self, name, passes, started=None, wait_for=None, log=None):
+        self.name = name
+        self.passes = passes
+        self.started = started
+        self.wait_for = wait_for
+        self.log = log
+
+    def __call__(self, v):
+        if self.started is not None:
+            self.started.set()
+        if self.wait_for is not None and not self.wait_for.wait(2):
+            raise error.Invalid('%s timed out' % self.name)
+        if self.log is not None:
+            self.log.append(self.name)
+        if not self.passes:
+            raise error.Invalid('%s failed' % self.name)
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_all_concurrent(self):
+        # Each lookup waits for the other to start, so they must run at once.
+        a, b = threading.Event(), threading.Event()
+        fn = concurrency.ConcurrentAll(validator.Required(),
+                                       Lookup('a', False, started=a, wait_for=b),
+                                       Lookup('b', False, started=b, wait_for=a))
+        e = fn._validate('x')
+        self.assertEquals(e.errors, ['a failed', 'b failed'])
+        self.assertEquals([x.validator.name for x in e.exceptions], ['a', 'b'])
+        self.assertEquals(e.validator, fn)
+        self.assertEquals(e.message, 'a failed; b failed')
+
+    def test_all_pass(self):
+        fn = concurrency.ConcurrentAll(validator.String(), Lookup('a', True), Lookup('b', True))
+        self.assertEquals(fn.is_valid('x'), True)
+        fn('x')
+
+    def test_all_inline_first(self):
+        log = []
+        fn = concurrency.ConcurrentAll(Lookup('a', False, log=log), validator.Integer(), fail_fast=True)
+        self.assertEquals(fn._validate('x').errors, ['must be a integer'])
+        self.assertEquals(log, [])
+        fn = concurrency.ConcurrentAll(Lookup('a', False, log=log), validator.Integer())
+        self.assertEquals(fn._validate('x').errors, ['a failed', 'must be a integer'])
+        self.assertEquals(log, ['a'])
+
+    def test_all_fail_fast(self):
+        never = threading.Event()
+        fn = concurrency.ConcurrentAll(Lookup('slow', True, wait_for=never), Lookup('a', False),
+                                       fail_fast=True)
+        self.assertEquals(fn._validate('x').errors, ['a failed'])
+        never.set()
+
+    def test_any_short_circuit(self):
+        never = threading.Event()
+        fn = concurrency.ConcurrentAny(Lookup('slow', False, wait_for=never), Lookup('a', True))
+        start = time.time()
+        self.assertEquals(fn.is_valid('x'), True)
+        self.assert_(time.time() - start < 1)
+        never.set()
+
+    def test_any_inline_first(self):
+        log = []
+        fn = concurrency.ConcurrentAny(Lookup('a', True, log=log), validator.Integer())
+        self.assertEquals(fn.is_valid(1), True)
+        self.assertEquals(log, [])
+
+    def test_any_fail(self):
+        fn = concurrency.ConcurrentAny(Lookup('a', False), validator.Integer(), Lookup('b', False))
+        e = fn._validate('x')
+        self.assertEquals(e.errors, ['a failed', 'must be a integer', 'b failed'])
+        self.assertEquals(e.message, 'Please fix any of: a failed; must be a integer; b failed')
+        self.assertRaises(error.Invalid, fn, 'x')
+
+    def test_exception(self):
+        class Broken(concurrency.AsyncValidator):
+            def __call__(self, v):
+                raise ValueError('lookup failed')
+        self.assertRaises(ValueError, concurrency.ConcurrentAll(Broken()), 'x')
+        self.assertRaises(ValueError, concurrency.ConcurrentAny(Broken()).is_valid, 'x')
+
+    def test_sync_use(self):
+        check_fail('class', self, Lookup('a', False), ['x'])
+        self.assertEquals(validator.All(Lookup('a', False))._validate('x').errors, ['a failed'])
+
+
+class TestValidateParallel(unittest.TestCase):
+
+    tree = validator.All(validator.Required(), validator.Any(validator.Email(), validator.URL(with_scheme=True)))
+    values = ['info@example.com', 'nope', '', 'http://example.com', None, 'x@y'] * 10
+
+    def test_same_as_validate_many(self):
+        expected = [(i, e and (e.errors, e.validator)) for i, e in self.tree.validate_many(self.values)]
+        results = parallel.validate_parallel(self.tree, self.values, workers=2, chunksize=7)
+        self.assertEquals([(i, e and (e.errors, e.validator)) for i, e in results], expected)
+
+    def test_failures_only(self):
+        results = parallel.validate_parallel(self.tree, self.values, workers=2, chunksize=4,
+                                             failures_only=True)
+        self.assertEquals([i for i, e in results],
+                          [i for i, e in self.tree.validate_many(self.values, failures_only=True)])
+
+    def test_empty(self):
+        self.assertEquals(list(parallel.validate_parallel(self.tree, [], workers=1)), [])
+
+    def test_bounded(self):
+        consumed = []
+        def values():
+            for i in xrange(100000):
+                consumed.append(i)
+                yield 'x'
+        results = parallel.validate_parallel(validator.Integer(), values(), workers=2, chunksize=10)
+        self.assertEquals(results.next()[0], 0)
+        self.assert_(len(consumed) <= 50, len(consumed))
+        results.close()
+
+    def test_exception(self):
+        results = parallel.validate_parallel(validator.Length(max=1), ['a', 1], workers=1)
+        self.assertRaises(TypeError, list, results)
+
+    def test_pickle_size(self):
+        import pickle
+        # Validators pickle as their constructor arguments, without the
+        # compiled regexes and indexes.
+        self.assert_(len(pickle.dumps(self.tree, 2)) < 400)
+        self.assert_(len(pickle.dumps(validator.OneOf(range(10)), 2)) < 150)
+
+
+class TestMapping(unittest.TestCase):
+
+    def setUp(self):
+        self.name = validator.All(validator.Required(), validator.String())
+        self.email = validator.Email()
+        self.age = validator.Integer()
+        self.fields = {'name': self.name, 'email': self.email, 'age': self.age}
+        self.fn = validator.Mapping(self.fields)
+
+    def test_pass(self):
+        self.section='pass'
+        check_pass('class', self, self.fn, [
+            {'name': 'Tim', 'email': 'info@example.com', 'age': 40},
+            {'name': 'Tim'},
+            {'name': 'Tim', 'other': 1},
+            None,
+            ])
+
+    def test_fail(self):
+        self.section='fail'
+        check_fail('class', self, self.fn, [
+            {},
+            {'name': 'Tim', 'email': 'info'},
+            'name',
+            ['name'],
+            ])
+
+    def test_custom_field_checked_once(self):
+        calls = []
+        class Odd(validator.Validator):
+            def __call__(self, v):
+                calls.append(v)
+                if not v % 2:
+                    raise error.Invalid('must be odd')
+        fn = validator.Mapping({'n': Odd()})
+        self.assertEquals(fn._validate({'n': 2}).errors, ['must be odd'])
+        self.assertEquals(calls, [2])
+
+    def test_shared_exceptions_copied(self):
+        cached = validator.Cached(validator.Integer())
+        fn = validator.Mapping({'a': cached, 'b': cached})
+        e = fn._validate({'a': 'x', 'b': 'x'})
+        self.assertEquals([x.key for x in e.exceptions], ['a', 'b'])
+        self.assertEquals(cached._validate('x').key, None)
+
+    def test_compiled_fields(self):
+        loaded = spec.load_spec({'type': 'Integer'})
+        fn = validator.Mapping({'a': compiler.compile(validator.Required()), 'b': loaded})
+        e = fn._validate({'a': '', 'b': 'x'})
+        self.assertEquals([x.key for x in e.exceptions], ['a', 'b'])
+        self.assertEquals(e.errors, ['is required', 'must be a integer'])
+        self.assertEquals(loaded._validate('x').key, None)
+        assert fn.is_valid({'a': 'x', 'b': 1})
+
+    def test_errors(self):
+        e = self.fn._validate({'email': 'info', 'age': 'x'})
+        self.assertEquals(e.validator, self.fn)
+        self.assertEquals([x.key for x in e.exceptions], ['age', 'email', 'name'])
+        self.assertEquals([x.validator for x in e.exceptions], [self.age, self.email, self.name])
+        self.assertEquals(e.message, 'age: must be a integer; email: must contain one @; name: is required')
+        self.assertEquals(e.errors, ['must be a integer', 'must contain one @', 'is required'])
+        self.assertEquals([path for path, message, v in e.error_details],
+                          [('age',), ('email',), ('name', 0)])
+
+    def test_nested(self):
+        fn = validator.Mapping({'user': self.fn, 'tags': validator.Length(max=2)})
+        e = fn._validate({'user': {'name': 'Tim', 'age': 1.5}, 'tags': [1, 2, 3]})
+        self.assertEquals(e.error_details, [
+            (('tags',), 'must have 2 or fewer items', fn.fields['tags']),
+            (('user', 'age'), 'must be a integer', self.age)])
+
+    def test_extra(self):
+        fn = validator.Mapping({'name': self.name}, extra=False)
+        e = fn._validate({'name': 'Tim', 'b': 1, 'a': 2})
+        self.assertEquals([x.key for x in e.exceptions], ['a', 'b'])
+        self.assertEquals(e.message, 'a: is not an expected field; b: is not an expected field')
+        self.assertEquals(fn.is_valid({'name': 'Tim', 'b': 1}), False)
+        self.assertEquals(fn.is_valid({'name': 'Tim'}), True)
+
+    def test_messages(self):
+        fn = validator.Mapping({}, extra=False, messages={'type-mapping': 'a record please',
+                                                          'unexpected': 'go away'})
+        self.assertEquals(fn._validate(1).message, 'a record please')
+        self.assertEquals(fn._validate({'x': 1}).message, 'x: go away')
+
+    def test_function_field(self):
+        def odd(v):
+            if v is not None and not v % 2:
+                raise error.Invalid('must be odd')
+        fn = validator.Mapping({'n': odd})
+        e = fn._validate({'n': 2})
+        self.assertEquals(e.error_details, [(('n',), 'must be odd', odd)])
+        self.assertEquals(fn.is_valid({'n': 3}), True)
+
+    def test_validate_many(self):
+        records = [{'name': 'Tim'}, {}, {'name': 1}]
+        self.assertEquals([(i, e.message) for i, e in self.fn.validate_many(records, failures_only=True)],
+                          [(1, 'name: is required'), (2, 'name: must be a string')])
+
+    def test_config(self):
+        self.assertEquals(self.fn, validator.Mapping(dict(self.fields)))
+        self.assertNotEquals(self.fn, validator.Mapping(self.fields, extra=False))
+        self.assertEquals(self.fn.validators, (self.age, self.email, self.name))
+        import pickle
+        self.assertEquals(pickle.loads(pickle.dumps(self.fn, 2)), self.fn)
+        e = pickle.loads(pickle.dumps(self.fn._validate({}), 2))
+        self.assertEquals(e.message, 'name: is required')
+
+
+CLI_SPEC = {
+    'name': validator.All(validator.Required(), validator.String()),
+    'email': validator.Email(),
+}
+
+
+CLI_TYPED_SPEC = {
+    'name': validator.Required(),
+    'age': validator.Integer(),
+}
+
+
+CLI_STRICT_SPEC = validator.Mapping(CLI_SPEC, extra=False)
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.dir)
+
+    def write(self, filename, content):
+        import os
+        path = os.path.join(self.dir, filename)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def run_cli(self, filename, content, *args, **kw):
+        import os, StringIO, sys
+        path = self.write(filename, content)
+        output = os.path.join(self.dir, 'failures.txt')
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            status = cli.main([kw.get('spec', 'validatish.tests.test_basic:CLI_SPEC'),
+                               path, '-o', output] + list(args))
+            summary = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        report = open(output).read()
+        # The report ends with the summary.
+        failures, sep, last = report[:-1].rpartition('\n')
+        self.assertEquals(last, '# ' + summary.rstrip('\n'))
+        return status, failures + sep, summary
+
+    def test_csv(self):
+        status, failures, summary = self.run_cli('people.csv', 'name,email\nTim,tim@example.com\n,x\nAnn,ann@example.com\n')
+        self.assertEquals(status, 1)
+        self.assertEquals(failures, '2\temail\tmust contain one @\n2\tname.0\tis required\n')
+        assert summary.startswith('3 records, 1 failed, ')
+
+    def test_jsonl(self):
+        status, failures, summary = self.run_cli('people.jsonl', '{"name": "Tim", "email": "tim@example.com"}\n\n{"name": 2}\n')
+        self.assertEquals(status, 1)
+        self.assertEquals(failures, '2\tname.0\tmust be a string\n')
+        assert summary.startswith('2 records, 1 failed, ')
+
+    def test_malformed_jsonl(self):
+        content = '{"name": "Tim"}\n{"name": \n{"name": 2}\n'
+        for args in [(), ('-w', '2', '-c', '1')]:
+            status, failures, summary = self.run_cli('people.jsonl', content, *args)
+            self.assertEquals(status, 1)
+            lines = failures.splitlines()
+            self.assertEquals(len(lines), 2)
+            assert lines[0].startswith('2\t\tis not valid JSON: ')
+            self.assertEquals(lines[1], '3\tname.0\tmust be a string')
+            assert summary.startswith('3 records, 2 failed, ')
+
+    def test_unicode(self):
+        content = '{"name": "Ren\\u00e9e", "\\u00e9": 1}\n'
+        spec = 'validatish.tests.test_basic:CLI_STRICT_SPEC'
+        status, failures, summary = self.run_cli('people.jsonl', content, spec=spec)
+        self.assertEquals(status, 1)
+        self.assertEquals(failures, '1\t\xc3\xa9\tis not an expected field\n')
+
+    def test_types(self):
+        content = 'name,age\nTim,40\nAnn,\nBob,old\n'
+        spec = 'validatish.tests.test_basic:CLI_TYPED_SPEC'
+        failures = self.run_cli('people.csv', content, spec=spec)[1]
+        self.assertEquals(failures.count('must be a integer'), 3)
+        status, failures, summary = self.run_cli('people.csv', content, '-t', 'age:int', spec=spec)
+        self.assertEquals(failures, '3\tage\tmust be a integer\n')
+        import StringIO, sys
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            self.assertRaises(SystemExit, cli.main, [spec, '-t', 'age:decimal'])
+        finally:
+            sys.stderr = stderr
+
+    def test_pass(self):
+        status, failures, summary = self.run_cli('people.txt', '{"name": "Tim"}\n', '-f', 'jsonl')
+        self.assertEquals(status, 0)
+        self.assertEquals(failures, '')
+
+    def test_workers(self):
+        content = 'name,email\n' + 'Tim,tim@example.com\n,x\n' * 10
+        expected = self.run_cli('people.csv', content)[1]
+        status, failures, summary = self.run_cli('people.csv', content, '-w', '2', '-c', '3')
+        self.assertEquals(failures, expected)
+        assert summary.startswith('20 records, 10 failed, ')
+
+    def test_load_validator(self):
+        self.assertEquals(cli.load_validator('validatish.tests.test_basic.CLI_SPEC'), validator.Mapping(CLI_SPEC))
+        self.assertEquals(cli.load_validator('validatish.validate:is_email')._validate('x').errors,
+                          ['must contain one @'])
+
+    def test_json_spec(self):
+        import json
+        path = self.write('spec.json', json.dumps(spec.to_spec(validator.Mapping(CLI_SPEC))))
+        expected = self.run_cli('people.csv', 'name,email\n,x\n')[1]
+        self.assertEquals(self.run_cli('people.csv', 'name,email\n,x\n', spec=path)[1], expected)
+
+
+class TestAdaptive(unittest.TestCase):
+
+    def test_any_order(self):
+        one_of = validator.OneOf(['a'])
+        string = validator.String()
+        fn = validator.Adaptive(validator.Any(one_of, string), interval=10)
+        self.assertEquals(fn.order(), [one_of, string])
+        for i in xrange(9):
+            assert fn.is_valid('x')
+        self.assertEquals([(info.calls, info.passed) for info in fn.child_info()], [(9, 0), (9, 9)])
+        fn('x')
+        self.assertEquals(fn.order(), [string, one_of])
+        info = fn.child_info()
+        self.assertEquals([(i.validator, i.calls, i.passed, i.position) for i in info],
+                          [(one_of, 4, 0, 1), (string, 5, 5, 0)])
+        assert info[1].cost >= 0
+        self.assertEquals(error_tree(fn._validate(1)), error_tree(fn.validator._validate(1)))
+
+    def test_all_fail_fast(self):
+        all_ = validator.All(validator.Required(), validator.Integer(), validator.Range(max=5),
+                             fail_fast=True)
+        fn = validator.Adaptive(all_, interval=10)
+        for i in xrange(20):
+            self.assertEquals(fn.is_valid(100), False)
+        self.assertEquals(fn.order()[0], all_.validators[2])
+        # The error is still the first failure in the original order.
+        for value in [100, '', 'x', 3, 'xxxxxx', None]:
+            self.assertEquals(fn.is_valid(value), all_.is_valid(value))
+            self.assertEquals(error_tree(fn._validate(value)), error_tree(all_._validate(value)))
+
+    def test_all_fail_fast_validate(self):
+        all_ = validator.All(validator.Required(), validator.Integer(), validator.Range(max=5),
+                             fail_fast=True)
+        fn = validator.Adaptive(all_, interval=10)
+        for i in xrange(20):
+            self.assertRaises(error.Invalid, fn, 100)
+        self.assertEquals(fn.order()[0], all_.validators[2])
+        assert fn.child_info()[2].calls > 0
+        for value in [100, '', 'x', 3, 'xxxxxx', None, 2.5]:
+            self.assertEquals(error_tree(fn._validate(value)), error_tree(all_._validate(value)))
+        # Range fails first, then Required and Integer are checked for the error.
+        calls = [info.calls for info in fn.child_info()]
+        self.assertEquals(error_tree(fn._validate('xxxxxx')), error_tree(all_._validate('xxxxxx')))
+        self.assertEquals([info.calls for info in fn.child_info()],
+                          [calls[0] + 1, calls[1] + 1, calls[2] + 1])
+
+    def test_all(self):
+        all_ = validator.All(validator.Integer(), validator.Range(max=5))
+        fn = validator.Adaptive(all_, interval=5)
+        for value in [100] * 10 + [3, 'x', 'xxxxxx']:
+            self.assertEquals(fn.is_valid(value), all_.is_valid(value))
+            self.assertEquals(error_tree(fn._validate(value)), error_tree(all_._validate(value)))
+        self.assertEquals(fn.order(), [all_.validators[1], all_.validators[0]])
+
+    def test_wraps_compounds_only(self):
+        self.assertRaises(ValueError, validator.Adaptive, validator.Required())
+        self.assertRaises(ValueError, validator.Adaptive,
+                          concurrency.ConcurrentAny(validator.Required()))
+
+    def test_config(self):
+        import pickle
+        any_ = validator.Any(validator.Integer(), validator.String())
+        self.assertEquals(validator.Adaptive(any_), validator.Adaptive(any_))
+        self.assertNotEquals(validator.Adaptive(any_), validator.Adaptive(any_, interval=10))
+        self.assertEquals(pickle.loads(pickle.dumps(validator.Adaptive(any_))), validator.Adaptive(any_))
+
+
+class TestSpec(unittest.TestCase):
+
+    validators = [
+        validator.Required(), validator.String(messages={'type-string': 'not text'}),
+        validator.PlainText(extra='-'), validator.Email(max_length=20),
+        validator.DomainName(), validator.URL(full=False, with_scheme=True),
+        validator.Integer(), validator.Number(), validator.Equal(None),
+        validator.Equal('x'), validator.OneOf(('a', 'b')), validator.OneOf(set([1, 2])),
+        validator.OneOf('ynb'), validator.OneOf([[1, 2], {'a': 1}]),
+        validator.Length(min=1), validator.Range(max=3.5), validator.Always(),
+        validator.Any(validator.Integer(), validator.String(), messages={'please-fix': 'no'}),
+        validator.All(validator.Required(), validator.Length(max=3), fail_fast=True),
+        validator.Cached(validator.Email(), maxsize=None),
+        validator.Mapping({'a': validator.Required()}, extra=False),
+        concurrency.ConcurrentAll(validator.Required()),
+        validator.Adaptive(validator.Any(validator.Integer()), interval=10),
+    ]
+
+    def test_round_trip(self):
+        import json
+        for v in self.validators:
+            loaded = spec.from_spec(json.loads(json.dumps(spec.to_spec(v))))
+            self.assertEquals(loaded, v)
+            self.assertEquals(type(loaded), type(v))
+            self.assertEquals(repr(loaded), repr(v))
+
+    def test_format(self):
+        self.assertEquals(spec.to_spec(validator.All(validator.Required(), validator.Length(max=64))),
+                          {'type': 'All', 'validators': [{'type': 'Required'},
+                                                         {'type': 'Length', 'max': 64}]})
+        self.assertEquals(spec.to_spec(validator.OneOf((1, 2))),
+                          {'type': 'OneOf', 'set_of_values': {'$tuple': [1, 2]}})
+        self.assertEquals(spec.to_spec(compiler.compile(validator.Required())), {'type': 'Required'})
+
+    def test_strings(self):
+        v = spec.from_spec({u'type': u'OneOf', u'set_of_values': [u'a', u'\xe9']})
+        self.assertEquals([type(value) for value in v.set_of_values], [str, unicode])
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, spec.to_spec, validator.All(validate.is_required))
+        self.assertRaises(ValueError, spec.to_spec, validator.Validator())
+        self.assertRaises(ValueError, spec.from_spec, {'type': 'Unknown'})
+        self.assertRaises(ValueError, spec.from_spec, [])
+
+    def test_types(self):
+        class Even(validator.Validator):
+            __slots__ = ('messages',)
+            def __init__(self, messages=None):
+                self.messages = messages
+            def __call__(self, v):
+                if v % 2:
+                    raise error.Invalid('must be even')
+            def _config(self):
+                return (), {'messages': self.messages}
+        s = spec.to_spec(validator.All(Even()))
+        self.assertRaises(ValueError, spec.from_spec, s)
+        self.assertEquals(spec.from_spec(s, types={'Even': Even}), validator.All(Even()))
+
+    def test_load_spec(self):
+        import json
+        s = spec.to_spec(validator.All(validator.Required(), validator.OneOf([1, 2])))
+        loaded = spec.load_spec(s)
+        assert isinstance(loaded, compiler.CompiledValidator)
+        self.assertEquals(loaded.validator, spec.from_spec(s))
+        assert spec.load_spec(s) is loaded
+        assert spec.load_spec(json.dumps(s)) is loaded
+        assert spec.load_spec(json.dumps(s, indent=2)) is loaded
+        self.assertEquals(loaded._validate(3).errors, ['must be one of [1, 2]'])
+
+    def test_one_of_index(self):
+        v = validator.OneOf(range(10))
+        assert v._index is None
+        assert v.is_valid(3)
+        assert v._index is not None
+
+
 class TestValidationIncludes(unittest.TestCase):
 
     def test_no_validator(self):
@@ -1,5 +1,11 @@
 """
 Library of basic validation functions.
+
+Each is_* function raises Invalid when the value fails. The checks themselves
+live in private _check_* functions that return None for a valid value or an
+error tuple of (message key, format params), so the validator classes can
+test values without constructing exceptions, and messages are only formatted
+when they are used.
 """
 
 import re
@@ -7,42 +13,121 @@ import re
 from validatish.error import Invalid
 
 
-# Various compiled regexs used in validation functions.
-_domain_name_regex = re.compile(r"^[a-z0-9][a-z0-9\.\-_]*\.[a-z]+$", re.I)
-_domain_user_regex = re.compile(r"(\.|\!|\#|\$|\%|\&|\'|\*|\+|\-|\/|\=|\?|\^|\_|\`|\{|\||\}|[a-z]|[A-Z]|[0-9])+$", re.I)
+# Characters allowed in domain names, which are checked by scanning rather
+# than with the regex ^[a-z0-9][a-z0-9\.\-_]*\.[a-z]+$ (re.I).
+_letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_letters_and_digits = _letters + "0123456789"
+_domain_name_chars = _letters_and_digits + ".-_"
+
+# The characters allowed in the username part of an email address.
+_email_user_chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.!#$%&'*+-/=?^_`{|}"
+
+# Compiled regexs built from validator arguments. The plaintext cache is keyed
+# by arbitrary strings so it is bounded in the same way as the re module's own
+# cache.
+_MAXCACHE = 100
+_plaintext_cache = {}
+_url_cache = {}
+
+
+# Default messages for each check, keyed by the error key.
+_required_messages = {
+    'required': "is required",
+}
+_string_messages = {
+    'type-string': "must be a string",
+}
+_plaintext_messages = {
+    'type-string': "must be a string",
+    'characters-and-numbers': "must consist of characters and numbers only",
+    'characters-and-numbers-extra': "must consist of characters and numbers plus any of %(extra)s",
+}
+_integer_messages = {
+    'type-integer': "must be a integer",
+}
+_number_messages = {
+    'type-number': "must be a number",
+}
+_email_messages = {
+    'type-string': "must be a string",
+    'too-long': "must have %(max_length)s or fewer characters",
+    'contain-at': "must contain one @",
+    'username-incorrect': "username part before the @ is incorrect",
+    'domain-incorrect': "domain name part after the @ is incorrect",
+}
+_domain_name_messages = {
+    'type-string': "must be a string",
+    'too-long': "must have %(max_length)s or fewer characters",
+    'invalid': "is invalid",
+}
+_url_messages = {
+    'type-url': "must be a url",
+}
+_equal_messages = {
+    'incorrect': "incorrect",
+}
+_one_of_messages = {
+    'one-of-empty': "must be one of []",
+    'one-of': "must be one of %(values)r",
+}
+_length_messages = {
+    'between': "must have between %(min)s and %(max)s %(unit)s",
+    'fewer-than': "must have %(max)s or fewer %(unit)s",
+    'more-than': "must have %(min)s or more %(unit)s",
+}
+_range_messages = {
+    'between': "must be between %(min)s and %(max)s",
+    'greater-than': "must be greater than or equal to %(min)s",
+    'less-than': "must be less than or equal to %(max)s",
+}
+
+
+def _invalid(default_messages, messages, error, validator=None):
+    """
+    Build the Invalid for an error returned by a _check function, preferring
+    any custom messages to the defaults. The message is formatted with the
+    error's params when it is first used.
+    """
+    key, params = error
+    if messages and key in messages:
+        message = messages[key]
+    else:
+        message = default_messages[key]
+    return Invalid(message, validator=validator, params=params)
 
 
 def is_required(v,messages=None, none_zero=True):
     """ Checks the non_zero attribute but allows numberic zero to pass """
+    error = _check_required(v, none_zero)
+    if error is not None:
+        raise _invalid(_required_messages, messages, error)
+
+
+def _check_required(v, none_zero=True):
     # XXX I still think it would be nicer if this just tested "is None". We did
     # discuss about the empty string "", but that's more of an input problem I
     # think, e.g. how does a higher layer interpret something that has not been
     # entered.
-    _messages = {
-        'required': "is required",
-    }
-    if messages:
-        _messages.update(messages)
-
     if none_zero:
         if not v and v != 0:
-            raise Invalid(_messages['required'])
+            return ('required', None)
     else:
         if v is None:
-            raise Invalid(_messages['required'])
+            return ('required', None)
 
 
 def is_string(v, messages=None):
     """ checks that the value is an instance of basestring """
+    error = _check_string(v)
+    if error is not None:
+        raise _invalid(_string_messages, messages, error)
+
+
+def _check_string(v):
     if v is None:
         return
-    _messages = {
-        'type-string': "must be a string",
-    }
-    if messages:
-        _messages.update(messages)
     if not isinstance(v,basestring):
-        raise Invalid(_messages['type-string'])
+        return ('type-string', None)
 
 
 def is_plaintext(v,extra=None, messages=None):
@@ -51,120 +136,178 @@ def is_plaintext(v,extra=None, messages=None):
 
     :arg extra: A list of extra characters that are allowed
     """
-    if v is None:
-        return
-    if extra:
-        extra.replace('-','\-')
-    regex = r"^[a-zA-Z0-9%s]*$"%extra
-
-    _messages = {
-        'type-string': "must be a string",
-        'characters-and-numbers': "must consist of characters and numbers only",
-        'characters-and-numbers-extra': "must consist of characters and numbers plus any of %(extra)s",
-    }
-    if messages:
-        _messages.update(messages)
+    error = _check_plaintext(v, _plaintext_regex(extra), extra)
+    if error is not None:
+        raise _invalid(_plaintext_messages, messages, error)
 
-    if not isinstance(v,basestring):
-        raise Invalid(_messages['type-string'])
 
-    msg = _messages['characters-and-numbers']
-    if extra is not None:
-        msg = _messages['characters-and-numbers-extra']%{'extra':extra}
+def _plaintext_regex(extra):
+    """
+    Return the compiled plain text matcher for the extra characters, using the
+    module cache so repeated functional calls do not recompile.
+    """
+    if extra is None:
+        extra = ''
+    elif not isinstance(extra, basestring):
+        extra = ''.join(extra)
+    try:
+        return _plaintext_cache[extra]
+    except KeyError:
+        pass
+    if len(_plaintext_cache) >= _MAXCACHE:
+        _plaintext_cache.clear()
+    regex = re.compile(r"^[a-zA-Z0-9%s]*$"%re.escape(extra), re.UNICODE)
+    _plaintext_cache[extra] = regex
+    return regex
 
-    p = re.compile(regex, re.UNICODE)
-    if not p.match(v):
-        raise Invalid(msg)
+
+def _check_plaintext(v, regex, extra):
+    if v is None:
+        return
+    if not isinstance(v,basestring):
+        return ('type-string', None)
+    if not regex.match(v):
+        if extra is not None:
+            return ('characters-and-numbers-extra', {'extra':extra})
+        return ('characters-and-numbers', None)
 
 
 def is_integer(v, messages=None):
     """ Checks that the value can be converted into an integer """
+    error = _check_integer(v)
+    if error is not None:
+        raise _invalid(_integer_messages, messages, error)
+
+
+def _check_integer(v):
     if v is None:
         return
-    _messages = {
-        'type-integer': "must be a integer",
-    }
-    if messages:
-        _messages.update(messages)
     try:
         if v != int(v):
-            raise Invalid(_messages['type-integer'])
+            return ('type-integer', None)
     except (ValueError, TypeError):
-        raise Invalid(_messages['type-integer'])
+        return ('type-integer', None)
 
 
 def is_number(v, messages=None):
     """ Checks that the value is not a string but can be converted to a float """
+    error = _check_number(v)
+    if error is not None:
+        raise _invalid(_number_messages, messages, error)
+
+
+def _check_number(v):
     if v is None:
         return
-    _messages = {
-        'type-number': "must be a number",
-    }
-    if messages:
-        _messages.update(messages)
+    if isinstance(v,basestring):
+        return ('type-number', None)
     try:
-        if isinstance(v,basestring):
-            raise Invalid(_messages['type-number'])
         float(v)
     except (ValueError, TypeError):
-        raise Invalid(_messages['type-number'])
+        return ('type-number', None)
 
 
-def is_email(v, messages=None):
+def is_email(v, messages=None, max_length=None):
     """
     Validate the value looks like an email address.
+
+    :arg max_length: optional maximum length of the address, checked before
+        anything else so very long values are rejected cheaply
     """
+    error = _check_email(v, max_length)
+    if error is not None:
+        raise _invalid(_email_messages, messages, error)
+
+
+def _check_email(v, max_length=None):
     if v is None:
         return
-    _messages = {
-        'type-string': "must be a string",
-        'contain-at': "must contain one @",
-        'username-incorrect': "username part before the @ is incorrect",
-        'domain-incorrect': "domain name part after the @ is incorrect",
-    }
-    if messages:
-        _messages.update(messages)
     if not isinstance(v ,basestring):
-        raise Invalid(_messages['type-string'])
+        return ('type-string', None)
+    if max_length is not None and len(v) > max_length:
+        return ('too-long', {'max_length': max_length})
     parts = v.split('@')
     if len(parts) !=2:
-        raise Invalid(_messages['contain-at'])
+        return ('contain-at', None)
     username, address = parts
-    if _domain_user_regex.match(username) is None:
-        raise Invalid(_messages['username-incorrect'])
-    if _domain_name_regex.match(address) is None:
-        raise Invalid(_messages['domain-incorrect'])
+    if not _is_email_user(username):
+        return ('username-incorrect', None)
+    if not _is_domain_name(address):
+        return ('domain-incorrect', None)
+
+
+def _is_email_user(username):
+    """
+    Check the username is one or more of the allowed characters, in a single
+    pass. As with the regex this replaced, a single trailing newline is
+    allowed.
+    """
+    if username.endswith('\n'):
+        username = username[:-1]
+    return bool(username) and not username.strip(_email_user_chars)
 
 
-def is_domain_name(value, messages=None):
+def is_domain_name(value, messages=None, max_length=None):
     """
     Validate the value looks like a domain name.
+
+    :arg max_length: optional maximum length of the domain name, checked
+        before anything else so very long values are rejected cheaply
     """
+    error = _check_domain_name(value, max_length)
+    if error is not None:
+        raise _invalid(_domain_name_messages, messages, error)
+
+
+def _check_domain_name(value, max_length=None):
     if value is None:
         return
-    _messages = {
-        'type-string': "must be a string",
-        'invalid': "is invalid",
-    }
-    if messages:
-        _messages.update(messages)
     if not isinstance(value, basestring):
-        raise Invalid(_messages['type-string'])
-    if _domain_name_regex.match(value) is None:
-        raise Invalid(_messages['invalid'])
+        return ('type-string', None)
+    if max_length is not None and len(value) > max_length:
+        return ('too-long', {'max_length': max_length})
+    if not _is_domain_name(value):
+        return ('invalid', None)
+
+
+def _is_domain_name(value):
+    """
+    Check the value is a letter or digit, then any letters, digits, dots,
+    hyphens or underscores, then a dot and a top level domain of letters. As
+    with the regex this replaced, a single trailing newline is allowed. Each
+    part is checked in a single pass, so the time is linear in the length.
+    """
+    if value.endswith('\n'):
+        value = value[:-1]
+    if not value or value[0] not in _letters_and_digits:
+        return False
+    # The top level domain contains no dots so it follows the last one.
+    dot = value.rfind('.')
+    if dot < 1:
+        return False
+    tld = value[dot+1:]
+    if not tld or tld.strip(_letters):
+        return False
+    return not value[1:dot].strip(_domain_name_chars)
 
 
 def is_url(v, full=True, absolute=True, relative=True, with_scheme=False, messages=None):
     """ Uses a simple regex from FormEncode to check for a url """
-    _messages = { 'type-url': "must be a url" }
-    if messages:
-        _messages.update(messages)
+    error = _check_url(v, _url_regex(full, absolute, relative, with_scheme))
+    if error is not None:
+        raise _invalid(_url_messages, messages, error)
 
-    if v is None:
-        return
-    if not isinstance(v,basestring):
-        raise Invalid(_messages['type-url'])
 
+def _url_regex(full, absolute, relative, with_scheme):
+    """
+    Return the compiled url matcher for the combination of flags. There are
+    only 16 combinations so the cache does not need bounding.
+    """
+    key = (bool(full), bool(absolute), bool(relative), bool(with_scheme))
+    try:
+        return _url_cache[key]
+    except KeyError:
+        pass
     exp = []
     if full:
         exp.append(r"(https?://)([a-z0-9][a-z0-9\-\.\_]*\.[a-z]+)(:[0-9]+)?(/.*)?")
@@ -174,9 +317,15 @@ def is_url(v, full=True, absolute=True, relative=True, with_scheme=False, messag
         exp.append('[^/(https?://)].*')
 
     urlRE = re.compile('^('+')$|^('.join(exp)+')$', re.I)
+    _url_cache[key] = urlRE
+    return urlRE
+
 
-    if not urlRE.search(v):
-        raise Invalid(_messages['type-url'])
+def _check_url(v, regex):
+    if v is None:
+        return
+    if not isinstance(v,basestring) or not regex.search(v):
+        return ('type-url', None)
 
 
 def is_equal(v, compared_to, messages=None):
@@ -185,14 +334,15 @@ def is_equal(v, compared_to, messages=None):
 
     :arg compared_to: the value to compare to
     """
-    _messages = {
-        'incorrect': "incorrect",
-    }
-    if messages:
-        _messages.update(messages)
+    error = _check_equal(v, compared_to)
+    if error is not None:
+        raise _invalid(_equal_messages, messages, error)
+
+
+def _check_equal(v, compared_to):
     if v is None or v == compared_to:
         return
-    raise Invalid(_messages['incorrect'])
+    return ('incorrect', None)
 
 
 def is_one_of(v, set_of_values, messages=None):
@@ -200,23 +350,59 @@ def is_one_of(v, set_of_values, messages=None):
     Check that the value is one of the set of values given
 
     :arg set_of_values: the set of values to check against
+
+    The lookup index is built on every call; use the OneOf validator to build
+    it once when checking against the same values repeatedly.
+    """
+    error = _check_one_of(v, _one_of_index(set_of_values), set_of_values)
+    if error is not None:
+        raise _invalid(_one_of_messages, messages, error)
+
+
+def _one_of_index(set_of_values):
     """
+    Build the lookup index for is_one_of.
+
+    The index is a frozenset of the hashable values, giving O(1) membership,
+    plus a tuple of any unhashable values (e.g. dicts) which fall back to a
+    linear equality scan. Lists are converted to tuples, in the same way as
+    the value being checked, so that they can be indexed.
+    """
+    try:
+        return frozenset(set_of_values), ()
+    except TypeError:
+        pass
+    hashable = []
+    unhashable = []
+    for value in set_of_values:
+        if isinstance(value, list):
+            value = tuple(value)
+        try:
+            hash(value)
+        except TypeError:
+            unhashable.append(value)
+        else:
+            hashable.append(value)
+    return frozenset(hashable), tuple(unhashable)
+
+
+def _check_one_of(v, index, set_of_values):
     if v is None:
         return
-    _messages = {
-        'one-of-empty': "must be one of []",
-        'one-of': "must be one of %(values)r",
-    }
-    if messages:
-        _messages.update(messages)
     if not set_of_values:
-        raise Invalid(_messages['one-of-empty'])
-    # XXX what's the following doing?
+        return ('one-of-empty', None)
     if isinstance(v,list):
         v = tuple(v)
-    # XXX Why create a set here?
-    if v not in set(set_of_values):
-        raise Invalid(_messages['one-of']%{'values':set_of_values})
+    hashable, unhashable = index
+    try:
+        if v in hashable:
+            return
+    except TypeError:
+        # An unhashable value can only equal one of the unhashable values.
+        pass
+    if unhashable and v in unhashable:
+        return
+    return ('one-of', {'values':set_of_values})
 
 
 def has_length(v, min=None, max=None, messages=None):
@@ -226,27 +412,26 @@ def has_length(v, min=None, max=None, messages=None):
     :arg max: optional max value
     :arg min: optional min value
     """
+    error = _check_length(v, min, max)
+    if error is not None:
+        raise _invalid(_length_messages, messages, error)
+
+
+def _check_length(v, min=None, max=None):
     if v is None:
         return
     if min is None and max is None:
         return
-    _messages = {
-        'between': "must have between %(min)s and %(max)s %(unit)s",
-        'fewer-than': "must have %(max)s or fewer %(unit)s",
-        'more-than': "must have %(min)s or more %(unit)s",
-    }
-    if messages:
-        _messages.update(messages)
     if isinstance(v,basestring):
         unit = 'characters'
     else:
         unit = 'items'
     if max is not None and min is not None and (len(v) > max or len(v) < min):
-        raise Invalid(_messages['between']%{'min':min, 'max':max, 'unit':unit})
+        return ('between', {'min':min, 'max':max, 'unit':unit})
     if max is not None and len(v) > max:
-        raise Invalid(_messages['fewer-than']%{'max':max, 'unit':unit})
+        return ('fewer-than', {'max':max, 'unit':unit})
     if min is not None and len(v) < min:
-        raise Invalid(_messages['more-than']%{'min':min, 'unit':unit})
+        return ('more-than', {'min':min, 'unit':unit})
 
 
 def is_in_range(v, min=None, max=None, messages=None):
@@ -256,27 +441,18 @@ def is_in_range(v, min=None, max=None, messages=None):
     :arg max: optional max value
     :arg min: optional min value
     """
+    error = _check_in_range(v, min, max)
+    if error is not None:
+        raise _invalid(_range_messages, messages, error)
 
+
+def _check_in_range(v, min=None, max=None):
     if min is None and max is None:
         return
-    if min is None and max is None:
-        return
-    _messages = {
-        'between': "must be between %(min)s and %(max)s",
-        'greater-than': "must be greater than or equal to %(min)s",
-        'less-than': "must be less than or equal to %(max)s",
-    }
-    if messages:
-        _messages.update(messages)
-    if min is not None and max is not None:
-        error = _messages['between']%{'min':min,'max':max}
-    elif min is not None:
-        error = _messages['greater-than']%{'min':min}
-    else:
-        error = _messages['less-than']%{'max':max}
-        
-    if max is not None and v > max:
-        raise Invalid(error)
-    if min is not None and v < min:
-        raise Invalid(error)
-
+    if (max is not None and v > max) or (min is not None and v < min):
+        if min is not None and max is not None:
+            return ('between', {'min':min,'max':max})
+        elif min is not None:
+            return ('greater-than', {'min':min})
+        else:
+            return ('less-than', {'max':max})
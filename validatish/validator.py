@@ -1,5 +1,9 @@
-from validatish import validate
-from error import Invalid
+import threading
+from collections import Mapping as _abc_Mapping, namedtuple
+from timeit import default_timer
+
+from validatish import validate, vectorised
+from error import Invalid, _JoinedMessages, _KeyedMessages
 
 
 #####
@@ -8,265 +12,794 @@ from error import Invalid
 
 
 class Validator(object):
-    """ Abstract Base class for all validators """
+    """
+    Abstract Base class for all validators
+
+    Validators whose class implements _config compare equal, and hash the
+    same, when their configuration is equal, so identical validators can be
+    shared. Others compare by identity, including subclasses which inherit
+    _config, as it does not describe any state they add.
+    """
+
+    __slots__ = ()
 
     def __call__(self, value):
         """ A method that will raise an Invalid error """
 
+    def is_valid(self, value):
+        """
+        Return True if the value passes validation, otherwise False. Unlike
+        calling the validator this never raises Invalid, and the built-in
+        validators do not construct exceptions or messages at all.
+        """
+        try:
+            self(value)
+        except Invalid:
+            return False
+        return True
+
+    def validate_many(self, values, failures_only=False):
+        """
+        Validate each value from an iterable, lazily yielding (index, error)
+        pairs where error is the Invalid for the value, or None if it passed.
+
+        Values are consumed one at a time so memory use does not depend on
+        the size of the input.
+
+        :arg failures_only: only yield the values that fail
+        """
+        validate_ = self._validate
+        for index, value in enumerate(values):
+            error = validate_(value)
+            if error is not None or not failures_only:
+                yield index, error
+
+    def _validate(self, value):
+        """
+        Return the Invalid describing why the value fails, without raising it,
+        or None if the value is valid.
+
+        This is the internal protocol compound validators use to collect
+        errors from their children. The built-in validators build exactly one
+        Invalid here; this default, for subclasses that only implement
+        __call__, catches the raised Invalid and attaches this validator to it.
+        """
+        try:
+            self(value)
+        except Invalid, e:
+            return Invalid(e._message, e.exceptions, self, e._params)
+
+    def _config(self):
+        """
+        Return the (args, kw) that construct an identical validator, or None
+        if validators of this class are only equal to themselves.
+        """
+        return None
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return False
+        config = _own_config(self)
+        if config is None:
+            return False
+        return _freeze(config) == _freeze(other._config())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        config = _own_config(self)
+        if config is None:
+            return object.__hash__(self)
+        return hash((type(self), _freeze(config)))
+
     def __repr__(self):
         return 'validatish.%s()'%self.__class__.__name__
 
 
+def _own_config(validator):
+    """
+    Return the validator's _config, or None if its class only inherits it.
+    """
+    if '_config' in type(validator).__dict__:
+        return validator._config()
+    return None
+
+
+def _freeze(value):
+    """
+    Convert a configuration value to a hashable equivalent. The type of
+    containers is kept, so e.g. a list and tuple of the same values, which
+    are reported differently in messages, stay different.
+    """
+    if isinstance(value, dict):
+        return type(value), frozenset((k, _freeze(v)) for k, v in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return type(value), frozenset(value)
+    return value
+
+
+def _rebuild(cls, args, kw):
+    return cls(*args, **kw)
+
+
+def _restore(cls, state):
+    validator = cls.__new__(cls)
+    for name, value in state.iteritems():
+        _set(validator, name, value)
+    return validator
+
+
+def _state(validator):
+    """ Return the values of the validator's slots and __dict__ """
+    state = {}
+    for cls in type(validator).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name not in state and hasattr(validator, name):
+                state[name] = getattr(validator, name)
+    state.update(getattr(validator, '__dict__', {}))
+    return state
+
+
+# Immutable validators set their attributes in __init__ with _set.
+_set = object.__setattr__
+
+
+class _Immutable(Validator):
+    """
+    Base class for the built-in validators, which cannot be changed once
+    constructed and are pickled by their configuration. Subclasses which do
+    not implement _config are pickled with all their attributes.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable'%self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable'%self.__class__.__name__)
+
+    def __reduce__(self):
+        config = _own_config(self)
+        if config is None:
+            return _restore, (self.__class__, _state(self))
+        args, kw = config
+        return _rebuild, (self.__class__, args, kw)
+
+
+class _LeafValidator(_Immutable):
+    """
+    Base class for the built-in leaf validators, which implement _check(v) to
+    return None or an error tuple from validatish.validate and set _messages
+    to the matching default messages.
+    """
+
+    __slots__ = ('messages',)
+
+    def __call__(self, v):
+        error = self._check(v)
+        if error is not None:
+            raise validate._invalid(self._messages, self.messages, error, self)
+
+    def is_valid(self, v):
+        if not _checks_directly(type(self)):
+            return Validator.is_valid(self, v)
+        return self._check(v) is None
+
+    def _validate(self, v):
+        if not _checks_directly(type(self)):
+            return Validator._validate(self, v)
+        error = self._check(v)
+        if error is not None:
+            return validate._invalid(self._messages, self.messages, error, self)
+
+
+# Whether each leaf class can be checked with _check, by class.
+_direct = {}
+
+
+def _checks_directly(cls):
+    """
+    Return whether the leaf validator class can be checked with its _check,
+    i.e. it does not override __call__. A subclass which does must be called
+    so that its own checks are not skipped.
+    """
+    direct = _direct.get(cls)
+    if direct is None:
+        direct = _direct[cls] = cls.__call__.im_func is _LeafValidator.__call__.im_func
+    return direct
+
+
+# The _validate of the built-in leaves, before any instrumentation wraps it.
+_leaf_validate = _LeafValidator.__dict__['_validate']
+
+
+def _failure(validator, v):
+    """
+    Return None if the value is valid for a child validator, otherwise what is
+    needed to build its Invalid later: the error tuple from the _check of a
+    built-in leaf, or the unraised Invalid of any other validator.
+    """
+    validate_ = getattr(validator, '_validate', None)
+    if getattr(validate_, 'im_func', None) is _leaf_validate and \
+            _checks_directly(type(validator)):
+        return validator._check(v)
+    return _validate(validator, v)
+
+
+def _exceptions(validators, failures):
+    """ Build the Invalid of each validator from its failure """
+    exceptions = []
+    for validator, failure in zip(validators, failures):
+        if type(failure) is tuple:
+            failure = validate._invalid(validator._messages, validator.messages, failure, validator)
+        exceptions.append(failure)
+    return exceptions
+
+
 class CompoundValidator(Validator):
     """ Abstract Base class for compound validators """
+    __slots__ = ()
     validators = None
 
 
+def _is_valid(validator, v):
+    """
+    Test the value against a child validator without raising Invalid. Plain
+    functions are allowed as validators so fall back to catching Invalid.
+    """
+    is_valid = getattr(validator, 'is_valid', None)
+    if is_valid is not None:
+        return is_valid(v)
+    try:
+        validator(v)
+    except Invalid:
+        return False
+    return True
+
+
+def _validate(validator, v):
+    """
+    Return the unraised Invalid for a child validator, or None if the value
+    is valid. Plain functions are wrapped in the same way as Validator._validate.
+    """
+    validate_ = getattr(validator, '_validate', None)
+    if validate_ is not None:
+        return validate_(v)
+    try:
+        validator(v)
+    except Invalid, e:
+        return Invalid(e._message, e.exceptions, validator, e._params)
+
+
 #####
 # Validators types.
 #
 
 
-class Required(Validator):
+class Required(_LeafValidator):
     """ Checks that the value is not empty
     """
 
+    _messages = validate._required_messages
+
+    __slots__ = ()
+
     def __init__(self, messages=None):
-        self.messages = messages
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_required(v, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'messages': self.messages}
+
+    def _check(self, v):
+        return validate._check_required(v)
 
 
 
-class String(Validator):
+class String(_LeafValidator):
     """ Checks whether value can be converted to an integer  """
 
+    _messages = validate._string_messages
+
+    __slots__ = ()
+
     def __init__(self, messages=None):
-        self.messages = messages
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_string(v)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'messages': self.messages}
 
+    def _check(self, v):
+        return validate._check_string(v)
 
-class PlainText(Validator):
+
+class PlainText(_LeafValidator):
     """ Checks whether value is a 'simple' string"""
 
+    _messages = validate._plaintext_messages
+
+    __slots__ = ('extra', '_regex')
+
     def __init__(self, extra='', messages=None):
-        self.extra = extra
-        self.messages = messages
+        _set(self, 'extra', extra)
+        _set(self, 'messages', messages)
+        _set(self, '_regex', validate._plaintext_regex(extra))
 
-    def __call__(self, v):
-        try:
-            validate.is_plaintext(v,extra=self.extra, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'extra': self.extra, 'messages': self.messages}
 
+    def _check(self, v):
+        return validate._check_plaintext(v, self._regex, self.extra)
 
-class Email(Validator):
-    """ Checks whether value looks like an email address.  """
 
-    def __init__(self, messages=None):
-        self.messages = messages
+class Email(_LeafValidator):
+    """
+    Checks whether value looks like an email address.
 
-    def __call__(self, v):
-        try:
-            validate.is_email(v, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    :arg max_length: optional maximum length of the address
+    """
 
+    _messages = validate._email_messages
 
-class DomainName(Validator):
-    """ Checks whether value looks like a domain name.  """
+    __slots__ = ('max_length',)
 
-    def __init__(self, messages=None):
-        self.messages = messages
+    def __init__(self, messages=None, max_length=None):
+        _set(self, 'messages', messages)
+        _set(self, 'max_length', max_length)
 
-    def __call__(self, v):
-        try:
-            validate.is_domain_name(v, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'messages': self.messages, 'max_length': self.max_length}
+
+    def _check(self, v):
+        return validate._check_email(v, self.max_length)
+
+
+class DomainName(_LeafValidator):
+    """
+    Checks whether value looks like a domain name.
+
+    :arg max_length: optional maximum length of the domain name
+    """
+
+    _messages = validate._domain_name_messages
 
+    __slots__ = ('max_length',)
 
-class URL(Validator):
+    def __init__(self, messages=None, max_length=None):
+        _set(self, 'messages', messages)
+        _set(self, 'max_length', max_length)
+
+    def _config(self):
+        return (), {'messages': self.messages, 'max_length': self.max_length}
+
+    def _check(self, v):
+        return validate._check_domain_name(v, self.max_length)
+
+
+class URL(_LeafValidator):
     """ Checks whether value is a url"""
+    _messages = validate._url_messages
+
+    __slots__ = ('full', 'absolute', 'relative', '_regex')
+
     def __init__(self, full=True, absolute=True, relative=True, with_scheme=False, messages=None):
-        self.full = full
-        self.absolute = absolute
-        self.relative = relative
         if with_scheme:
-            self.absolute = False
-            self.relative = False
-        self.messages = messages
-
-    def __call__(self, v):
-        try:
-            validate.is_url(v, full=self.full, absolute=self.absolute, relative=self.relative,  messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+            absolute = False
+            relative = False
+        _set(self, 'full', full)
+        _set(self, 'absolute', absolute)
+        _set(self, 'relative', relative)
+        _set(self, 'messages', messages)
+        _set(self, '_regex', validate._url_regex(full, absolute, relative, with_scheme))
+
+    def _config(self):
+        # with_scheme only clears absolute and relative, so is not needed.
+        return (), {'full': self.full, 'absolute': self.absolute,
+                    'relative': self.relative, 'messages': self.messages}
+
+    def _check(self, v):
+        return validate._check_url(v, self._regex)
 
     def __repr__(self):
         return 'validatish.%s(full=%s, absolute=%s, relative=%s)'%(self.__class__.__name__, self.full, self.absolute, self.relative)
 
 
-class Integer(Validator):
+class Integer(_LeafValidator):
     """ Checks whether value can be converted to an integer  """
 
+    _messages = validate._integer_messages
+
+    __slots__ = ()
+
     def __init__(self, messages=None):
-        self.messages = messages
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_integer(v, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'messages': self.messages}
 
+    def _check(self, v):
+        return validate._check_integer(v)
 
-class Number(Validator):
+    def validate_array(self, values):
+        """
+        Check a NumPy array of values in one vectorised call, returning a
+        boolean mask of the values that pass and the indices of those that
+        fail.
+        """
+        mask = vectorised.integer_mask(values)
+        return mask, vectorised.failures(mask)
+
+
+class Number(_LeafValidator):
     """ Checks whether value can be converted to a number and is not a string  """
 
+    _messages = validate._number_messages
+
+    __slots__ = ()
+
     def __init__(self, messages=None):
-        self.messages = messages
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_number(v, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'messages': self.messages}
 
+    def _check(self, v):
+        return validate._check_number(v)
 
-class Equal(Validator):
+    def validate_array(self, values):
+        """ Vectorised check of an array, see Integer.validate_array """
+        mask = vectorised.number_mask(values)
+        return mask, vectorised.failures(mask)
+
+
+class Equal(_LeafValidator):
     """
     Validator that checks a value is equal to the comparison value, equal_to.
     """
+    _messages = validate._equal_messages
+
+    __slots__ = ('compared_to',)
+
     def __init__(self, compared_to, messages=None):
-        self.compared_to = compared_to
-        self.messages = messages
+        _set(self, 'compared_to', compared_to)
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_equal(v, self.compared_to, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (self.compared_to,), {'messages': self.messages}
+
+    def _check(self, v):
+        return validate._check_equal(v, self.compared_to)
 
     def __repr__(self):
         return 'validatish.%s(%s)'%(self.__class__.__name__, self.compared_to)
 
 
-class OneOf(Validator):
-    """ Checks whether value is one of a supplied list of values"""
+class OneOf(_LeafValidator):
+    """
+    Checks whether value is one of a supplied list of values
+
+    The lookup index is built when the first value is checked, so large sets
+    of values cost nothing until they are used.
+    """
+
+    _messages = validate._one_of_messages
+
+    __slots__ = ('set_of_values', '_index')
 
     def __init__(self, set_of_values, messages=None):
-        self.set_of_values = set_of_values
-        self.messages=messages
+        _set(self, 'set_of_values', set_of_values)
+        _set(self, 'messages', messages)
+        _set(self, '_index', None)
 
-    def __call__(self, v):
-        try:
-            validate.is_one_of(v, self.set_of_values, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (self.set_of_values,), {'messages': self.messages}
+
+    def _check(self, v):
+        index = self._index
+        if index is None:
+            # Threads racing here build equal indexes, so either can be kept.
+            index = validate._one_of_index(self.set_of_values)
+            _set(self, '_index', index)
+        return validate._check_one_of(v, index, self.set_of_values)
 
     def __repr__(self):
         return 'validatish.%s(%s)'%(self.__class__.__name__, self.set_of_values)
 
 
-class Length(Validator):
+class Length(_LeafValidator):
     """ Check whether the length of the value is not outside min/max bound(s) """
 
+    _messages = validate._length_messages
+
+    __slots__ = ('min', 'max')
+
     def __init__(self, min=None, max=None, messages=None):
-        self.max = max
-        self.min = min
-        self.messages = messages
+        _set(self, 'max', max)
+        _set(self, 'min', min)
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.has_length(v, min=self.min, max=self.max, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'min': self.min, 'max': self.max, 'messages': self.messages}
+
+    def _check(self, v):
+        return validate._check_length(v, self.min, self.max)
+
+    def validate_array(self, values):
+        """ Vectorised check of an array of strings or sequences """
+        mask = vectorised.length_mask(values, self.min, self.max)
+        return mask, vectorised.failures(mask)
 
     def __repr__(self):
         return 'validatish.%s(min=%s, max=%s)'%(self.__class__.__name__, self.min, self.max)
 
 
-class Range(Validator):
+class Range(_LeafValidator):
     """ Check whether the value is not outside min/max bound(s) """
 
+    _messages = validate._range_messages
+
+    __slots__ = ('min', 'max')
+
     def __init__(self, min=None, max=None, messages=None):
-        self.max = max
-        self.min = min
-        self.messages = messages
+        _set(self, 'max', max)
+        _set(self, 'min', min)
+        _set(self, 'messages', messages)
 
-    def __call__(self, v):
-        try:
-            validate.is_in_range(v, min=self.min, max=self.max, messages=self.messages)
-        except Invalid, e:
-            raise Invalid(e.message, validator=self)
+    def _config(self):
+        return (), {'min': self.min, 'max': self.max, 'messages': self.messages}
+
+    def _check(self, v):
+        return validate._check_in_range(v, self.min, self.max)
+
+    def validate_array(self, values):
+        """ Vectorised check of an array, see Integer.validate_array """
+        mask = vectorised.in_range_mask(values, self.min, self.max)
+        return mask, vectorised.failures(mask)
 
     def __repr__(self):
         return 'validatish.%s(min=%s, max=%s)'%(self.__class__.__name__, self.min, self.max)
 
 
-class Any(CompoundValidator):
+_any_messages = {
+    'please-fix': "Please fix any of: %(errors)s",
+}
+
+
+class Any(CompoundValidator, _Immutable):
     """
     Combines multiple validators together, raising an exception only if they
     all fail (i.e. validation succeeds if any validator passes).
+
+    :arg messages: custom messages, i.e. 'please-fix', which is formatted
+        with the joined messages of the validators as %(errors)s
     """
 
+    __slots__ = ('validators', 'messages')
+
     def __init__(self, *args, **kw):
-        self.validators=args
-        self.messages = kw.get('messages')
+        _set(self, 'validators', args)
+        _set(self, 'messages', kw.get('messages'))
+
+    def _config(self):
+        return self.validators, {'messages': self.messages}
 
     def __call__(self, v):
-        exceptions = []
-        for validator in self.validators:
-            try:
-                validator(v)
-            except Invalid, e :
-                exceptions.append(Invalid(e.message, e.exceptions, validator))
-            else:
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def _validate(self, v):
+        # Usually one of the validators passes, so each is checked once and
+        # the exceptions are only built once every validator has failed.
+        validators = self.validators
+        failures = []
+        for validator in validators:
+            failure = _failure(validator, v)
+            if failure is None:
                 return
-        message = '; '.join(e.message for e in exceptions)
-        _messages = {
-            'please-fix': "Please fix any of: %(errors)s",
-        }
-        if self.messages:
-            _messages.update(messages)
-        raise Invalid(_messages['please-fix']%{'errors':message}, exceptions, self)
+            failures.append(failure)
+        return self._error(_exceptions(validators, failures))
+
+    def _error(self, exceptions):
+        """ Build the Invalid once every validator has failed """
+        if self.messages and 'please-fix' in self.messages:
+            message = self.messages['please-fix']
+        else:
+            message = _any_messages['please-fix']
+        return Invalid(message, exceptions, self, _JoinedMessages(exceptions))
+
+    def is_valid(self, v):
+        for validator in self.validators:
+            if _is_valid(validator, v):
+                return True
+        return False
 
     def __repr__(self):
         return 'validatish.%s%s'%(self.__class__.__name__, self.validators)
 
 
-class All(CompoundValidator):
-    """ Combines multiple validators together, raising an exception unless they all pass """
+class All(CompoundValidator, _Immutable):
+    """
+    Combines multiple validators together, raising an exception unless they all pass
+
+    :arg fail_fast: stop at the first validator that fails, so the exception
+        only describes that failure. Defaults to All.default_fail_fast, which
+        can be set to change the default globally.
+    """
+
+    __slots__ = ('validators', '_fail_fast')
+
+    default_fail_fast = False
+
+    def __init__(self, *args, **kw):
+        fail_fast = kw.pop('fail_fast', None)
+        if kw:
+            raise TypeError('All got unexpected keyword arguments: %s'%', '.join(sorted(kw)))
+        _set(self, 'validators', args)
+        _set(self, '_fail_fast', fail_fast)
+
+    @property
+    def fail_fast(self):
+        if self._fail_fast is None:
+            return self.default_fail_fast
+        return self._fail_fast
 
-    def __init__(self, *args):
-        self.validators = args
+    def _config(self):
+        return self.validators, {'fail_fast': self._fail_fast}
 
     def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def _validate(self, v):
         exceptions = []
+        fail_fast = self.fail_fast
         for validator in self.validators:
-            try:
-                validator(v)
-            except Invalid, e:
-                exceptions.append(Invalid(e.message, e.exceptions, validator))
+            e = _validate(validator, v)
+            if e is not None:
+                exceptions.append(e)
+                if fail_fast:
+                    break
 
         if len(exceptions):
-            message = '; '.join(e.message for e in exceptions)
-            raise Invalid(message, exceptions, self)
+            return self._error(exceptions)
+
+    def _error(self, exceptions):
+        """ Build the Invalid from the failing validators' exceptions """
+        return Invalid('%(errors)s', exceptions, self, _JoinedMessages(exceptions))
+
+    def is_valid(self, v):
+        for validator in self.validators:
+            if not _is_valid(validator, v):
+                return False
+        return True
 
     def __repr__(self):
         return 'validatish.%s%s'%(self.__class__.__name__, self.validators)
 
 
-class Always(Validator):
+def _fresh(validator):
+    """
+    Test whether the validator's _validate always builds a new exception, so
+    Mapping can set its key rather than copying it. Custom implementations,
+    e.g. Cached's, may return the same exception again.
+    """
+    if not isinstance(validator, Validator):
+        # Plain functions are wrapped in a new exception by _validate.
+        return True
+    # CompiledValidator keeps its _validate in a slot, so it is not a method.
+    method = getattr(getattr(type(validator), '_validate', None), 'im_func', None)
+    for cls in (Validator, _LeafValidator, All, Any, Mapping):
+        if method is cls.__dict__['_validate']:
+            return True
+    return False
+
+
+_mapping_messages = {
+    'type-mapping': "must be a mapping",
+    'unexpected': "is not an expected field",
+}
+
+
+class Mapping(CompoundValidator, _Immutable):
+    """
+    Validates a dict, or other mapping, of fields with a validator per field,
+    raising one Invalid for all the fields that fail. The exceptions are in
+    the order of the sorted field names and each has its field as its key.
+
+    A missing field is validated as None, so only fails if its validator
+    requires a value.
+
+    :arg fields: a dict of field name to validator
+    :arg extra: allow fields which are not in fields; if False each one is
+        reported as 'unexpected'
+    """
+
+    __slots__ = ('fields', 'extra', 'messages', 'validators', '_plan')
+
+    def __init__(self, fields, extra=True, messages=None):
+        _set(self, 'fields', fields)
+        _set(self, 'extra', extra)
+        _set(self, 'messages', messages)
+        keys = sorted(fields)
+        _set(self, 'validators', tuple(fields[key] for key in keys))
+        # The plan is the (key, validator, fresh) of each field, so each call
+        # is a loop over a tuple without any dict iteration.
+        _set(self, '_plan', tuple((key, fields[key], _fresh(fields[key]))
+                                  for key in keys))
+
+    def _config(self):
+        return (self.fields,), {'extra': self.extra, 'messages': self.messages}
+
+    def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def _validate(self, v):
+        if v is None:
+            return
+        if not isinstance(v, (dict, _abc_Mapping)):
+            return Invalid(self._message('type-mapping'), validator=self)
+        exceptions = None
+        get = v.get
+        for key, validator, fresh in self._plan:
+            e = _validate(validator, get(key))
+            if e is None:
+                continue
+            if fresh:
+                e.key = key
+            else:
+                # The exception may be shared, e.g. by Cached, so copy it.
+                e = Invalid(e._message, e.exceptions, e.validator, e._params, key)
+            if exceptions is None:
+                exceptions = [e]
+            else:
+                exceptions.append(e)
+        if not self.extra:
+            fields = self.fields
+            for key in sorted(v):
+                if key not in fields:
+                    e = Invalid(self._message('unexpected'), validator=self, key=key)
+                    if exceptions is None:
+                        exceptions = [e]
+                    else:
+                        exceptions.append(e)
+        if exceptions is not None:
+            return Invalid('%(errors)s', exceptions, self, _KeyedMessages(exceptions))
+
+    def _message(self, key):
+        if self.messages and key in self.messages:
+            return self.messages[key]
+        return _mapping_messages[key]
+
+    def is_valid(self, v):
+        if v is None:
+            return True
+        if not isinstance(v, (dict, _abc_Mapping)):
+            return False
+        get = v.get
+        for key, validator, fresh in self._plan:
+            if not _is_valid(validator, get(key)):
+                return False
+        if not self.extra:
+            fields = self.fields
+            for key in v:
+                if key not in fields:
+                    return False
+        return True
+
+    def __repr__(self):
+        return 'validatish.%s(%r)'%(self.__class__.__name__, self.fields)
+
+
+class Always(_Immutable):
     """
     A validator that always passes, mostly useful as a default.
 
@@ -274,9 +807,337 @@ class Always(Validator):
     bothering actually calling it.
     """
 
+    __slots__ = ()
+
     def __call__(self, v):
         pass
 
+    def is_valid(self, v):
+        return True
+
+    def _validate(self, v):
+        return None
+
     def __nonzero__(self):
         return False
 
+    def _config(self):
+        return (), {}
+
+
+
+# Positions in the Cached linked list entries.
+_PREV, _NEXT, _KEY, _RESULT = 0, 1, 2, 3
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize size')
+
+
+class Cached(_Immutable):
+    """
+    Wraps a validator, remembering the outcome, including the Invalid, for
+    the most recently checked values.
+
+    Values are keyed by their type and value, so they must be hashable;
+    unhashable values are checked without the cache. Each Cached has its own
+    cache, so results are never shared between validators. It is thread safe.
+    The same Invalid is returned for repeated failures of a value, so it
+    should not be modified.
+
+    :arg validator: the validator, which should not have side effects
+    :arg maxsize: the number of values to remember, or None for no limit
+    """
+
+    __slots__ = ('validator', 'maxsize', '_cache', '_root', '_lock', '_stats')
+
+    def __init__(self, validator, maxsize=1000):
+        _set(self, 'validator', validator)
+        _set(self, 'maxsize', maxsize)
+        _set(self, '_cache', {})
+        # The root of a circular doubly linked list, most recently used first.
+        root = []
+        root[:] = [root, root, None, None]
+        _set(self, '_root', root)
+        _set(self, '_lock', threading.Lock())
+        # Hits and misses.
+        _set(self, '_stats', [0, 0])
+
+    def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def is_valid(self, v):
+        return self._validate(v) is None
+
+    def _validate(self, v):
+        try:
+            key = (type(v), v)
+            hash(key)
+        except TypeError:
+            return _validate(self.validator, v)
+        lock = self._lock
+        lock.acquire()
+        try:
+            link = self._cache.get(key)
+            if link is not None:
+                self._stats[0] += 1
+                root = self._root
+                prev, next = link[_PREV], link[_NEXT]
+                prev[_NEXT] = next
+                next[_PREV] = prev
+                first = root[_NEXT]
+                link[_PREV] = root
+                link[_NEXT] = first
+                first[_PREV] = root[_NEXT] = link
+                return link[_RESULT]
+            self._stats[1] += 1
+        finally:
+            lock.release()
+        # Validate outside the lock so slow validators do not block others.
+        result = _validate(self.validator, v)
+        lock.acquire()
+        try:
+            cache = self._cache
+            if key not in cache:
+                root = self._root
+                first = root[_NEXT]
+                link = [root, first, key, result]
+                first[_PREV] = root[_NEXT] = cache[key] = link
+                if self.maxsize is not None and len(cache) > self.maxsize:
+                    last = root[_PREV]
+                    root[_PREV] = last[_PREV]
+                    last[_PREV][_NEXT] = root
+                    del cache[last[_KEY]]
+        finally:
+            lock.release()
+        return result
+
+    def cache_info(self):
+        """ Return the hits, misses, maxsize and current size of the cache """
+        lock = self._lock
+        lock.acquire()
+        try:
+            return CacheInfo(self._stats[0], self._stats[1], self.maxsize, len(self._cache))
+        finally:
+            lock.release()
+
+    def cache_clear(self):
+        """ Forget all the remembered values and reset the statistics """
+        lock = self._lock
+        lock.acquire()
+        try:
+            self._cache.clear()
+            root = self._root
+            root[:] = [root, root, None, None]
+            self._stats[:] = [0, 0]
+        finally:
+            lock.release()
+
+    def _config(self):
+        return (self.validator,), {'maxsize': self.maxsize}
+
+    def __repr__(self):
+        return 'validatish.%s(%r, maxsize=%s)'%(self.__class__.__name__, self.validator, self.maxsize)
+
+
+
+ChildInfo = namedtuple('ChildInfo', 'validator calls passed cost position')
+
+# Adaptive times the children on one call in this many.
+_TIMING_SAMPLE = 16
+
+# The failure of a validator which Adaptive has not checked yet.
+_UNCHECKED = object()
+
+# Positions in the Adaptive statistics of each child.
+_CALLS, _PASSED, _TIMED, _TIME = 0, 1, 2, 3
+
+
+class Adaptive(_Immutable):
+    """
+    Wraps an All or Any, checking its validators in the order that has
+    recently been fastest to decide the result: the validators most likely to
+    pass first for an Any, and most likely to fail first for an All, each
+    weighed against its cost.
+
+    The pass rate of each validator is counted on every call and its cost is
+    timed on a sample of calls. The order is recalculated every interval
+    calls, when the counts are halved so that recent outcomes count most.
+
+    The result and the exception are always the same as the wrapped
+    validator's. A fail-fast All's exception must describe the first
+    validator to fail in the original order, so once one fails, those before
+    it which were not reached are checked too. A full All checks every
+    validator anyway, so is only reordered for is_valid. It is thread
+    safe, although counts may be lost when threads update them at once.
+
+    :arg validator: the All or Any, whose validators should not have side
+        effects
+    :arg interval: the number of calls between reorderings
+    """
+
+    __slots__ = ('validator', 'interval', '_any', '_order', '_stats', '_calls', '_lock')
+
+    def __init__(self, validator, interval=1000):
+        if type(validator) not in (All, Any):
+            raise ValueError('Adaptive can only wrap an All or Any, not %r'%(validator,))
+        _set(self, 'validator', validator)
+        _set(self, 'interval', interval)
+        _set(self, '_any', type(validator) is Any)
+        # The (index, validator) in the order they are checked.
+        _set(self, '_order', tuple(enumerate(validator.validators)))
+        _set(self, '_stats', [[0, 0, 0.0, 0.0] for child in validator.validators])
+        _set(self, '_calls', [0])
+        _set(self, '_lock', threading.Lock())
+
+    def __call__(self, v):
+        error = self._validate(v)
+        if error is not None:
+            raise error
+
+    def is_valid(self, v):
+        if self._any:
+            return self._run(v, True) is not None
+        return self._run(v, False) is None
+
+    def _validate(self, v):
+        validator = self.validator
+        if not self._any:
+            if not validator.fail_fast:
+                return validator._validate(v)
+            return self._validate_fail_fast(v)
+        failures = [None] * len(validator.validators)
+        if self._run(v, True, failures) is not None:
+            return None
+        # The exceptions are in the order of the validators.
+        return validator._error(_exceptions(validator.validators, failures))
+
+    def _validate_fail_fast(self, v):
+        validators = self.validator.validators
+        failures = [_UNCHECKED] * len(validators)
+        first = self._run(v, False, failures)
+        if first is None:
+            return None
+        # The error must be the first failure in the original order, so check
+        # the validators before it which were not reached.
+        stats = self._stats
+        for index in xrange(first):
+            if failures[index] is not _UNCHECKED:
+                continue
+            failure = _failure(validators[index], v)
+            counts = stats[index]
+            counts[_CALLS] += 1
+            if failure is None:
+                counts[_PASSED] += 1
+            else:
+                failures[index] = failure
+                first = index
+                break
+        return self.validator._error(_exceptions([validators[first]], [failures[first]]))
+
+    def _run(self, v, stop, failures=None):
+        """
+        Check the validators in the current order until one passes, if stop
+        is True, or fails, if stop is False, returning its index or None.
+        The failure of each validator is kept by index in failures, if given.
+        """
+        calls = self._calls
+        calls[0] += 1
+        if calls[0] >= self.interval:
+            self._reorder()
+        stats = self._stats
+        if calls[0] % _TIMING_SAMPLE:
+            for index, child in self._order:
+                if failures is None:
+                    passed = _is_valid(child, v)
+                else:
+                    failure = failures[index] = _failure(child, v)
+                    passed = failure is None
+                counts = stats[index]
+                counts[_CALLS] += 1
+                if passed:
+                    counts[_PASSED] += 1
+                    if stop:
+                        return index
+                elif not stop:
+                    return index
+            return None
+        for index, child in self._order:
+            start = default_timer()
+            if failures is None:
+                passed = _is_valid(child, v)
+            else:
+                failure = failures[index] = _failure(child, v)
+                passed = failure is None
+            elapsed = default_timer() - start
+            counts = stats[index]
+            counts[_CALLS] += 1
+            counts[_TIMED] += 1
+            counts[_TIME] += elapsed
+            if passed:
+                counts[_PASSED] += 1
+                if stop:
+                    return index
+            elif not stop:
+                return index
+        return None
+
+    def _cost(self, counts):
+        if counts[_TIMED]:
+            return counts[_TIME] / counts[_TIMED]
+        return None
+
+    def _reorder(self):
+        lock = self._lock
+        if not lock.acquire(False):
+            # Another thread is already reordering.
+            return
+        try:
+            self._calls[0] = 0
+            stats = self._stats
+            costs = [self._cost(counts) for counts in stats]
+            timed = [cost for cost in costs if cost is not None]
+            # Untimed validators are assumed to cost the average.
+            default = 1.0
+            if timed:
+                default = sum(timed) / len(timed)
+            scores = []
+            for index, counts in enumerate(stats):
+                # The chance of this validator deciding the result.
+                decides = (counts[_PASSED] + 1.0) / (counts[_CALLS] + 2.0)
+                if not self._any:
+                    decides = 1.0 - decides
+                cost = costs[index]
+                if cost is None:
+                    cost = default
+                scores.append((cost / decides, index))
+                counts[_CALLS] //= 2
+                counts[_PASSED] //= 2
+                counts[_TIMED] /= 2
+                counts[_TIME] /= 2
+            scores.sort()
+            children = self.validator.validators
+            _set(self, '_order', tuple((index, children[index]) for score, index in scores))
+        finally:
+            lock.release()
+
+    def child_info(self):
+        """
+        Return the statistics of each of the validators, in their original
+        order: the decayed counts of calls and passes, the mean cost in
+        seconds of the timed calls, or None, and the position in the current
+        order.
+        """
+        positions = dict((index, position) for position, (index, child) in enumerate(self._order))
+        return [ChildInfo(child, counts[_CALLS], counts[_PASSED], self._cost(counts), positions[index])
+                for index, (child, counts) in enumerate(zip(self.validator.validators, self._stats))]
+
+    def order(self):
+        """ Return the validators in the order they are currently checked """
+        return [child for index, child in self._order]
+
+    def _config(self):
+        return (self.validator,), {'interval': self.interval}
+
+    def __repr__(self):
+        return 'validatish.%s(%r, interval=%s)'%(self.__class__.__name__, self.validator, self.interval)
@@ -0,0 +1,102 @@
+"""
+NumPy implementations of the numeric and length validators, checking a whole
+array in one call.
+
+Each function returns a boolean mask that is True where the value passes, with
+the same accept/reject rules as the matching function in validatish.validate.
+Arrays with an object dtype fall back to the scalar checks for each item.
+
+NumPy is an optional dependency, only imported when an array is first checked;
+the functions raise ImportError if it is not installed.
+"""
+
+from validatish import validate
+
+# Set by _asarray, so importing validatish does not load NumPy.
+numpy = None
+
+
+def _asarray(values):
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('NumPy is required for array validation')
+    return numpy.asarray(values)
+
+
+def _scalar_mask(check, values, *args):
+    """
+    Build the mask by running a scalar _check function on each item.
+    """
+    return numpy.fromiter((check(v, *args) is None for v in values.flat),
+                          bool, values.size).reshape(values.shape)
+
+
+def failures(mask):
+    """
+    Return the flat indices of the values that failed.
+    """
+    return numpy.flatnonzero(~mask)
+
+
+def in_range_mask(values, min=None, max=None):
+    """
+    Check each value is not less than min and not greater than max.
+    """
+    values = _asarray(values)
+    mask = numpy.ones(values.shape, bool)
+    if max is not None:
+        mask &= ~(values > max)
+    if min is not None:
+        mask &= ~(values < min)
+    return mask
+
+
+def number_mask(values):
+    """
+    Check each value is a number and not a string.
+    """
+    values = _asarray(values)
+    kind = values.dtype.kind
+    if kind in 'biuf':
+        return numpy.ones(values.shape, bool)
+    if kind in 'cSU':
+        return numpy.zeros(values.shape, bool)
+    return _scalar_mask(validate._check_number, values)
+
+
+def integer_mask(values):
+    """
+    Check each value is equal to its integer conversion.
+    """
+    values = _asarray(values)
+    kind = values.dtype.kind
+    if kind in 'biu':
+        return numpy.ones(values.shape, bool)
+    if kind == 'f':
+        finite = numpy.isfinite(values)
+        return finite & (numpy.trunc(numpy.where(finite, values, 0)) == values)
+    if kind in 'cSU':
+        return numpy.zeros(values.shape, bool)
+    return _scalar_mask(validate._check_integer, values)
+
+
+def length_mask(values, min=None, max=None):
+    """
+    Check the length of each string or sequence is not less than min and not
+    greater than max.
+    """
+    values = _asarray(values)
+    if min is None and max is None:
+        return numpy.ones(values.shape, bool)
+    if values.dtype.kind not in 'SU':
+        return _scalar_mask(validate._check_length, values, min, max)
+    lengths = numpy.char.str_len(values)
+    mask = numpy.ones(values.shape, bool)
+    if max is not None:
+        mask &= lengths <= max
+    if min is not None:
+        mask &= lengths >= min
+    return mask